@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from dataclasses import replace
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from benchmarks.synthetic import write_dataset
+from src.config import LOCAL_QDRANT_URL
+
+
+DEFAULT_SIZES = "10k,100k,1m"
+STUB_DIM = 128
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline dedupe pipeline benchmarks")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma list, e.g. 10k,100k,1m")
+    parser.add_argument("--backend", choices=("numpy", "qdrant"), default="numpy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threshold", type=float, default=0.75)
+    parser.add_argument(
+        "--brute-force-max",
+        type=int,
+        default=50_000,
+        help="Above this many rows, candidates come from MinHash/LSH blocking",
+    )
+    parser.add_argument("--data-dir", default=".cache/benchmarks")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.05,
+        help="Ignore stages faster than this in the baseline when comparing",
+    )
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single is not None:
+        print(json.dumps(_run_single(args, args.single)))
+        return
+
+    runs = []
+    for rows in _parse_sizes(args.sizes):
+        started = time.perf_counter()
+        write_dataset(Path(args.data_dir), rows, seed=args.seed)
+        generated = time.perf_counter() - started
+        print(f"rows={rows}: dataset ready in {generated:.1f}s, running pipeline...", flush=True)
+        # A fresh interpreter per size keeps peak RSS meaningful.
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.run", *sys.argv[1:], "--single", str(rows)],
+            check=True,
+            capture_output=True,
+            text=True,
+            env=_child_env(args),
+        ).stdout
+        run = json.loads(output.strip().splitlines()[-1])
+        runs.append(run)
+        stages = ", ".join(f"{stage}={seconds:.2f}s" for stage, seconds in run["stages"].items())
+        print(
+            f"  total={run['total_seconds']:.2f}s "
+            f"rows/s={run['rows_per_second']:.0f} "
+            f"peak_rss={run['peak_rss_bytes'] / 1024 / 1024:.0f}MB "
+            f"precision={run['precision']:.3f} recall={run['recall']:.3f} f1={run['f1']:.3f}"
+        )
+        print(f"  {stages}")
+
+    results = {"meta": _meta(args), "runs": runs}
+    Path(args.out).write_text(json.dumps(results, indent=2, sort_keys=True), encoding="utf-8")
+    print(f"Wrote {args.out}.")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.tolerance, args.min_seconds)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}.")
+
+
+def compare(
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    tolerance: float,
+    min_seconds: float,
+) -> list[str]:
+    previous = {(run["rows"], run["backend"]): run for run in baseline.get("runs", [])}
+    regressions: list[str] = []
+    for run in results["runs"]:
+        before = previous.get((run["rows"], run["backend"]))
+        if before is None:
+            continue
+        label = f"rows={run['rows']} backend={run['backend']}"
+        checks = {
+            f"stage {stage}": (seconds, before["stages"].get(stage))
+            for stage, seconds in run["stages"].items()
+        }
+        checks["total"] = (run["total_seconds"], before["total_seconds"])
+        for name, (current, previous_seconds) in checks.items():
+            if previous_seconds is None or previous_seconds < min_seconds:
+                continue
+            if current > previous_seconds * (1 + tolerance):
+                regressions.append(
+                    f"{label} {name}: {previous_seconds:.3f}s -> {current:.3f}s"
+                )
+        if run["peak_rss_bytes"] > before["peak_rss_bytes"] * (1 + tolerance):
+            regressions.append(
+                f"{label} peak_rss: {before['peak_rss_bytes']} -> {run['peak_rss_bytes']} bytes"
+            )
+        if run["f1"] < before["f1"] - 0.01:
+            regressions.append(f"{label} f1: {before['f1']:.3f} -> {run['f1']:.3f}")
+    return regressions
+
+
+def stub_embedder(texts: list[str]) -> np.ndarray:
+    matrix = np.zeros((len(texts), STUB_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        padded = f" {text.casefold()} "
+        for start in range(len(padded) - 2):
+            matrix[row] += _trigram_vector(padded[start : start + 3])
+    return matrix
+
+
+@lru_cache(maxsize=None)
+def _trigram_vector(trigram: str) -> np.ndarray:
+    seed = zlib.crc32(trigram.encode("utf-8"))
+    return np.random.default_rng(seed).standard_normal(STUB_DIM).astype(np.float32)
+
+
+def _run_single(args: argparse.Namespace, rows: int) -> dict[str, Any]:
+    from src.config import Config
+    from src.pipeline import run_pipeline
+
+    data_path, gold_path = write_dataset(Path(args.data_dir), rows, seed=args.seed)
+    config = replace(
+        Config.from_env(),
+        search_backend=args.backend,
+        sim_threshold=args.threshold,
+        collection_name=f"bench_{rows}",
+        embed_cache_path="",
+        incremental=False,
+        stream_chunk_size=0,
+        dedupe_key="none",
+        blocking="replace" if rows > args.brute_force_max else "none",
+        export_formats=(),
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        result = run_pipeline(
+            config=config,
+            data_path=data_path,
+            report_path=Path(directory) / "report.html",
+            gold_path=gold_path,
+            log=lambda message: None,
+            embedder=stub_embedder,
+        )
+        summary = json.loads(Path(result["run_summary"]).read_text(encoding="utf-8"))
+    metrics = result["metrics"] or {}
+    return {
+        "rows": rows,
+        "backend": args.backend,
+        "blocking": config.blocking,
+        "rows_per_second": rows / summary["total_seconds"] if summary["total_seconds"] else 0.0,
+        "precision": metrics.get("precision", 0.0),
+        "recall": metrics.get("recall", 0.0),
+        "f1": metrics.get("f1", 0.0),
+        **summary,
+    }
+
+
+def _child_env(args: argparse.Namespace) -> dict[str, str]:
+    env = dict(os.environ)
+    if args.backend == "qdrant":
+        # The in-process local client does not handle concurrent upserts.
+        env.update({"QDRANT_URL": LOCAL_QDRANT_URL, "UPSERT_PARALLEL": "1"})
+    return env
+
+
+def _parse_sizes(spec: str) -> list[int]:
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    sizes = []
+    for part in spec.split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        multiplier = multipliers.get(part[-1], 1)
+        sizes.append(int(float(part.rstrip("km")) * multiplier))
+    return sizes
+
+
+def _meta(args: argparse.Namespace) -> dict[str, Any]:
+    return {
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "backend": args.backend,
+        "seed": args.seed,
+        "threshold": args.threshold,
+        "embedder": f"stub-trigram-{STUB_DIM}",
+    }
+
+
+if __name__ == "__main__":
+    main()
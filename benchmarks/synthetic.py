@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import csv
+import random
+from pathlib import Path
+from typing import Iterator
+
+
+# Bump when the generated data changes so cached datasets are not reused.
+GENERATOR_VERSION = 2
+SUFFIX_GROUPS = (
+    ("Inc", "Inc.", "Incorporated"),
+    ("Corp", "Corp.", "Corporation"),
+    ("LLC", "L.L.C."),
+    ("Ltd", "Ltd.", "Limited"),
+    ("Co", "Co.", "Company"),
+    ("GmbH",),
+    ("",),
+)
+INDUSTRY_WORDS = (
+    "Systems", "Logistics", "Foods", "Analytics", "Energy", "Capital", "Labs",
+    "Media", "Health", "Robotics", "Materials", "Partners", "Holdings", "Networks",
+    "Software", "Consulting", "Pharma", "Motors", "Textiles", "Solutions",
+)
+_ONSETS = ("b", "br", "c", "cl", "d", "dr", "f", "g", "gr", "k", "l", "m", "n", "p",
+           "pr", "qu", "r", "s", "st", "t", "tr", "v", "w", "z")
+_VOWELS = ("a", "e", "i", "o", "u", "ae", "io", "ou")
+_CODAS = ("", "n", "r", "x", "s", "l", "nt", "rk", "m")
+
+
+def write_dataset(
+    directory: Path,
+    rows: int,
+    *,
+    seed: int = 0,
+    duplicate_rate: float = 0.35,
+    max_variants: int = 4,
+) -> tuple[Path, Path]:
+    directory.mkdir(parents=True, exist_ok=True)
+    stem = f"companies_v{GENERATOR_VERSION}_{rows}_{seed}"
+    data_path = directory / f"{stem}.csv"
+    gold_path = directory / f"{stem}_gold.csv"
+    if data_path.exists() and gold_path.exists():
+        return data_path, gold_path
+
+    rng = random.Random(seed)
+    # Every company draws fresh words, so unrelated names only share industry
+    # words and suffixes however many rows are generated.
+    vocabulary = _vocabulary(rng, size=max(500, rows))
+    rng.shuffle(vocabulary)
+    words = iter(vocabulary)
+    records: list[tuple[str, int]] = []
+    group = 0
+    while len(records) < rows:
+        core = _core_name(rng, words)
+        suffixes = rng.choice(SUFFIX_GROUPS)
+        copies = 1
+        if rng.random() < duplicate_rate:
+            copies += rng.randint(1, max_variants)
+        copies = min(copies, rows - len(records))
+        records.append((_join(core, suffixes[0]), group))
+        for _ in range(copies - 1):
+            records.append((_variant(rng, core, suffixes), group))
+        group += 1
+    rng.shuffle(records)
+
+    with open(data_path, "w", encoding="utf-8", newline="") as data_out, open(
+        gold_path, "w", encoding="utf-8", newline=""
+    ) as gold_out:
+        data_writer = csv.writer(data_out)
+        gold_writer = csv.writer(gold_out)
+        data_writer.writerow(["id", "company_name"])
+        gold_writer.writerow(["id", "company_name", "group_id"])
+        for point_id, (name, group_id) in enumerate(records, start=1):
+            data_writer.writerow([point_id, name])
+            gold_writer.writerow([point_id, name, f"G{group_id}"])
+    return data_path, gold_path
+
+
+def _vocabulary(rng: random.Random, size: int) -> list[str]:
+    words: set[str] = set()
+    while len(words) < size:
+        syllables = rng.randint(3, 4)
+        word = "".join(
+            rng.choice(_ONSETS) + rng.choice(_VOWELS) for _ in range(syllables)
+        ) + rng.choice(_CODAS)
+        words.add(word.capitalize())
+    return sorted(words)
+
+
+def _core_name(rng: random.Random, vocabulary: Iterator[str]) -> str:
+    words = [next(vocabulary) for _ in range(rng.randint(1, 2))]
+    if rng.random() < 0.3:
+        words.append(rng.choice(INDUSTRY_WORDS))
+    return " ".join(words)
+
+
+def _join(core: str, suffix: str) -> str:
+    return f"{core} {suffix}" if suffix else core
+
+
+def _variant(rng: random.Random, core: str, suffixes: tuple[str, ...]) -> str:
+    name = _join(core, rng.choice(suffixes))
+    edits = rng.sample(("case", "typo", "punctuation", "and"), k=rng.randint(1, 2))
+    for edit in edits:
+        if edit == "case":
+            name = rng.choice((str.upper, str.lower, str.title))(name)
+        elif edit == "typo":
+            name = _typo(rng, name)
+        elif edit == "punctuation":
+            name = _punctuate(rng, name)
+        elif " " in core:
+            name = name.replace(" ", rng.choice((" & ", " and ")), 1)
+    return name
+
+
+def _typo(rng: random.Random, name: str) -> str:
+    if len(name) < 4:
+        return name
+    index = rng.randrange(1, len(name) - 1)
+    kind = rng.randrange(3)
+    if kind == 0:
+        return name[:index] + name[index + 1 :]
+    if kind == 1:
+        return name[:index] + name[index + 1] + name[index] + name[index + 2 :]
+    return name[:index] + rng.choice("abcdefghijklmnopqrstuvwxyz") + name[index + 1 :]
+
+
+def _punctuate(rng: random.Random, name: str) -> str:
+    if "." in name and rng.random() < 0.5:
+        return name.replace(".", "")
+    parts = name.rsplit(" ", 1)
+    if len(parts) == 2 and rng.random() < 0.5:
+        return f"{parts[0]}, {parts[1]}"
+    return name + rng.choice((".", ",", " -"))
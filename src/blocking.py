@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import zlib
+from typing import Any, Iterable
+
+import numpy as np
+
+from src.normalize import canonical_key
+from src.records import RecordBatch
+
+
+BLOCKING_MODES = ("none", "replace", "restrict")
+BUCKET_NEIGHBORS = 8
+
+_PRIME = np.uint64(4_294_967_311)
+_MAX_HASH = np.uint64(np.iinfo(np.uint64).max)
+_SCORE_CHUNK = 65_536
+_HASH_CHUNK = 65_536
+_SEED = 1_234_567
+
+
+def minhash_signatures(names: Iterable[str], num_perm: int, ngram: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(_SEED)
+    a = rng.integers(1, 2**32 - 1, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, 2**32 - 1, size=num_perm, dtype=np.uint64)
+    shingle_sets = [_shingle_hashes(name, ngram) for name in names]
+    signatures = np.full((len(shingle_sets), num_perm), _MAX_HASH, dtype=np.uint64)
+    sizes = np.fromiter((len(shingles) for shingles in shingle_sets), dtype=np.int64)
+    filled = np.flatnonzero(sizes)
+    if filled.size == 0:
+        return signatures
+    shingles = np.concatenate([shingle_sets[row] for row in filled.tolist()])
+    offsets = np.concatenate(([0], np.cumsum(sizes[filled])[:-1]))
+    # Hash shingles in slices that end on row boundaries to bound memory.
+    start_row = 0
+    while start_row < filled.size:
+        end_row = int(
+            np.searchsorted(offsets, offsets[start_row] + _HASH_CHUNK, side="right")
+        )
+        end_row = max(end_row, start_row + 1)
+        first = offsets[start_row]
+        last = offsets[end_row] if end_row < filled.size else shingles.size
+        hashed = (np.outer(shingles[first:last], a) + b) % _PRIME
+        signatures[filled[start_row:end_row]] = np.minimum.reduceat(
+            hashed, offsets[start_row:end_row] - first, axis=0
+        )
+        start_row = end_row
+    return signatures
+
+
+def lsh_candidates(
+    signatures: np.ndarray,
+    bands: int,
+    rows_per_band: int,
+    bucket_neighbors: int = BUCKET_NEIGHBORS,
+) -> np.ndarray:
+    if signatures.shape[1] < bands * rows_per_band:
+        raise ValueError("Signatures are shorter than bands * rows_per_band.")
+    mixers = np.random.default_rng(_SEED + 1).integers(
+        1, 2**63 - 1, size=rows_per_band, dtype=np.uint64
+    ) | np.uint64(1)
+    hashed_rows = np.flatnonzero((signatures != _MAX_HASH).any(axis=1))
+    count = np.int64(signatures.shape[0])
+    found = np.empty(0, dtype=np.int64)
+    for band in range(bands):
+        first = band * rows_per_band
+        columns = signatures[hashed_rows, first : first + rows_per_band]
+        keys = (columns * mixers).sum(axis=1, dtype=np.uint64)
+        # Within a bucket, members sharing more signature sit next to each other,
+        # and each links only to its next few members so output stays O(n).
+        tiebreak = signatures[hashed_rows, (first + rows_per_band) % signatures.shape[1]]
+        sort_index = np.lexsort((tiebreak, keys))
+        order = hashed_rows[sort_index]
+        sorted_keys = keys[sort_index]
+        band_codes = []
+        for offset in range(1, bucket_neighbors + 1):
+            same = np.flatnonzero(sorted_keys[offset:] == sorted_keys[:-offset])
+            if not same.size:
+                break
+            left = order[same]
+            right = order[same + offset]
+            band_codes.append(np.minimum(left, right) * count + np.maximum(left, right))
+        if band_codes:
+            found = np.union1d(found, np.concatenate(band_codes))
+    return np.column_stack((found // count, found % count))
+
+
+def blocked_pairs(
+    rows: RecordBatch, *, bands: int, rows_per_band: int, ngram: int = 3
+) -> list[tuple[Any, Any, float]]:
+    if rows.vectors is None:
+        raise ValueError("Blocking needs embedding vectors to score candidate pairs.")
+    candidates = _candidate_indices(rows, bands, rows_per_band, ngram)
+    scores = _cosine_scores(rows.vectors, candidates)
+    ids = rows.id_list()
+    return [
+        (ids[left], ids[right], float(score))
+        for (left, right), score in zip(candidates.tolist(), scores.tolist(), strict=True)
+    ]
+
+
+def restrict_pairs(
+    pairs: list[tuple[Any, Any, float]],
+    rows: RecordBatch,
+    *,
+    bands: int,
+    rows_per_band: int,
+    ngram: int = 3,
+) -> list[tuple[Any, Any, float]]:
+    ids = rows.id_list()
+    allowed = {
+        frozenset((ids[left], ids[right]))
+        for left, right in _candidate_indices(rows, bands, rows_per_band, ngram).tolist()
+    }
+    return [pair for pair in pairs if frozenset(pair[:2]) in allowed]
+
+
+def _candidate_indices(
+    rows: RecordBatch, bands: int, rows_per_band: int, ngram: int
+) -> np.ndarray:
+    signatures = minhash_signatures(rows.names.tolist(), bands * rows_per_band, ngram)
+    return lsh_candidates(signatures, bands, rows_per_band)
+
+
+def _shingle_hashes(name: str, ngram: int) -> np.ndarray:
+    key = canonical_key(name, "folded")
+    if not key:
+        return np.empty(0, dtype=np.uint64)
+    padded = f" {key} "
+    shingles = {
+        padded[start : start + ngram]
+        for start in range(max(1, len(padded) - ngram + 1))
+    }
+    return np.fromiter(
+        (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+
+
+def _cosine_scores(vectors: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1)
+    norms[norms == 0] = 1.0
+    unit = vectors / norms[:, None]
+    scores = np.empty(len(pairs), dtype=np.float32)
+    for start in range(0, len(pairs), _SCORE_CHUNK):
+        chunk = pairs[start : start + _SCORE_CHUNK]
+        scores[start : start + len(chunk)] = np.einsum(
+            "ij,ij->i", unit[chunk[:, 0]], unit[chunk[:, 1]]
+        )
+    return scores
@@ -1,5 +1,9 @@
 import os
 from dataclasses import dataclass
+from functools import lru_cache
+
+
+LOCAL_QDRANT_URL = ":memory:"
 
 
 @dataclass(frozen=True)
@@ -11,6 +15,46 @@ class Config:
     sim_threshold: float
     top_k: int
     collection_name: str
+    embed_cache_path: str
+    embed_cache_max_mb: int
+    embed_batch_size: int
+    embed_batch_max_tokens: int
+    embed_concurrency: int
+    ollama_embed_mode: str
+    search_batch_size: int
+    search_backend: str
+    search_block_mb: int
+    upsert_batch_size: int
+    upsert_parallel: int
+    qdrant_prefer_grpc: bool
+    qdrant_grpc_port: int
+    qdrant_pool_size: int
+    incremental: bool
+    stream_chunk_size: int
+    dedupe_key: str
+    blocking: str
+    blocking_bands: int
+    blocking_rows: int
+    blocking_ngram: int
+    report_max_clusters: int
+    report_gzip: bool
+    export_formats: tuple[str, ...]
+    export_dir: str
+    job_workers: int
+    job_queue_depth: int
+    max_upload_mb: int
+    result_cache_dir: str
+    result_cache_max_mb: int
+    result_cache_ttl_hours: float
+    lifecycle_db: str
+    lifecycle_ttl_hours: float
+    lifecycle_max_mb: int
+    lifecycle_sweep_minutes: float
+    admin_token: str
+    health_ttl_seconds: float
+    health_refresh_seconds: float
+    master_collection: str
+    master_matrix_max_rows: int
 
     @classmethod
     def from_env(cls) -> "Config":
@@ -22,9 +66,54 @@ class Config:
             sim_threshold=_get_env_float("SIM_THRESHOLD", 0.83),
             top_k=_get_env_int("TOP_K", 5),
             collection_name=os.getenv("COLLECTION_NAME", "companies"),
+            embed_cache_path=os.getenv("EMBED_CACHE_PATH", ".cache/embeddings.sqlite3"),
+            embed_cache_max_mb=_get_env_int("EMBED_CACHE_MAX_MB", 1024),
+            embed_batch_size=_get_env_int("EMBED_BATCH_SIZE", 512),
+            embed_batch_max_tokens=_get_env_int("EMBED_BATCH_MAX_TOKENS", 250_000),
+            embed_concurrency=_get_env_int("EMBED_CONCURRENCY", 4),
+            ollama_embed_mode=os.getenv("OLLAMA_EMBED_MODE", "auto"),
+            search_batch_size=_get_env_int("SEARCH_BATCH_SIZE", 256),
+            search_backend=os.getenv("SEARCH_BACKEND", "qdrant"),
+            search_block_mb=_get_env_int("SEARCH_BLOCK_MB", 256),
+            upsert_batch_size=_get_env_int("UPSERT_BATCH_SIZE", 256),
+            upsert_parallel=_get_env_int("UPSERT_PARALLEL", 4),
+            qdrant_prefer_grpc=_get_env_bool("QDRANT_PREFER_GRPC", False),
+            qdrant_grpc_port=_get_env_int("QDRANT_GRPC_PORT", 6334),
+            qdrant_pool_size=_get_env_int("QDRANT_POOL_SIZE", 16),
+            incremental=_get_env_bool("INCREMENTAL", False),
+            stream_chunk_size=_get_env_int("STREAM_CHUNK_SIZE", 0),
+            dedupe_key=os.getenv("DEDUPE_KEY", "none"),
+            blocking=os.getenv("BLOCKING", "none"),
+            blocking_bands=_get_env_int("BLOCKING_BANDS", 16),
+            blocking_rows=_get_env_int("BLOCKING_ROWS", 6),
+            blocking_ngram=_get_env_int("BLOCKING_NGRAM", 3),
+            report_max_clusters=_get_env_int("REPORT_MAX_CLUSTERS", 0),
+            report_gzip=_get_env_bool("REPORT_GZIP", False),
+            export_formats=_get_env_list("EXPORT_FORMATS"),
+            export_dir=os.getenv("EXPORT_DIR", ""),
+            job_workers=_get_env_int("JOB_WORKERS", 2),
+            job_queue_depth=_get_env_int("JOB_QUEUE_DEPTH", 16),
+            max_upload_mb=_get_env_int("MAX_UPLOAD_MB", 2048),
+            result_cache_dir=os.getenv("RESULT_CACHE_DIR", ".cache/results"),
+            result_cache_max_mb=_get_env_int("RESULT_CACHE_MAX_MB", 2048),
+            result_cache_ttl_hours=_get_env_float("RESULT_CACHE_TTL_HOURS", 24.0),
+            lifecycle_db=os.getenv("LIFECYCLE_DB", ".cache/lifecycle.sqlite3"),
+            lifecycle_ttl_hours=_get_env_float("LIFECYCLE_TTL_HOURS", 72.0),
+            lifecycle_max_mb=_get_env_int("LIFECYCLE_MAX_MB", 10240),
+            lifecycle_sweep_minutes=_get_env_float("LIFECYCLE_SWEEP_MINUTES", 15.0),
+            admin_token=os.getenv("ADMIN_TOKEN", ""),
+            health_ttl_seconds=_get_env_float("HEALTH_TTL_SECONDS", 60.0),
+            health_refresh_seconds=_get_env_float("HEALTH_REFRESH_SECONDS", 30.0),
+            master_collection=os.getenv("MASTER_COLLECTION", "master"),
+            master_matrix_max_rows=_get_env_int("MASTER_MATRIX_MAX_ROWS", 50_000),
         )
 
 
+@lru_cache(maxsize=1)
+def get_config() -> Config:
+    return Config.from_env()
+
+
 def _get_env_float(name: str, default: float) -> float:
     value = os.getenv(name)
     if value is None or value == "":
@@ -43,3 +132,20 @@ def _get_env_int(name: str, default: int) -> int:
         return int(value)
     except ValueError as exc:
         raise ValueError(f"Environment variable {name} must be an integer") from exc
+
+
+def _get_env_list(name: str) -> tuple[str, ...]:
+    value = os.getenv(name, "")
+    return tuple(part.strip().lower() for part in value.split(",") if part.strip())
+
+
+def _get_env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    normalized = value.strip().lower()
+    if normalized in {"1", "true", "yes", "on"}:
+        return True
+    if normalized in {"0", "false", "no", "off"}:
+        return False
+    raise ValueError(f"Environment variable {name} must be a boolean")
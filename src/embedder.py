@@ -1,15 +1,97 @@
 from __future__ import annotations
 
+import atexit
+import threading
 import time
-from typing import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from pathlib import Path
+from typing import Any, Callable
 
 import httpx
+import numpy as np
 
 from src.config import Config
+from src.embedding_cache import CachedEmbedder, EmbeddingCache
+from src.metrics import increment, timed
+from src.records import as_matrix
+
+
+_OPENAI_EMBEDDINGS_URL = "https://api.openai.com/v1/embeddings"
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+MatrixEmbedder = Callable[[list[str]], np.ndarray]
+
+_HTTP_CLIENTS: dict[tuple[str, str, int], httpx.Client] = {}
+_CACHES: dict[tuple[str, int], EmbeddingCache] = {}
+_SHARED_LOCK = threading.Lock()
 
 
 def get_embedder() -> Callable[[list[str]], list[list[float]]]:
+    embed = get_matrix_embedder()
+
+    def embed_lists(texts: list[str]) -> list[list[float]]:
+        return embed(texts).tolist()
+
+    return embed_lists
+
+
+def get_matrix_embedder() -> MatrixEmbedder:
     config = Config.from_env()
+    embed = _provider_embedder(config)
+    if not config.embed_cache_path:
+        return embed
+    cache = _embedding_cache(
+        config.embed_cache_path, config.embed_cache_max_mb * 1024 * 1024
+    )
+    return CachedEmbedder(embed, cache, config.embed_model)
+
+
+def close_clients() -> None:
+    with _SHARED_LOCK:
+        clients = list(_HTTP_CLIENTS.values())
+        caches = list(_CACHES.values())
+        _HTTP_CLIENTS.clear()
+        _CACHES.clear()
+    for client in clients:
+        client.close()
+    for cache in caches:
+        cache.close()
+
+
+atexit.register(close_clients)
+
+
+def _embedding_cache(path: str, max_bytes: int) -> EmbeddingCache:
+    key = (str(Path(path).resolve()), max_bytes)
+    with _SHARED_LOCK:
+        cache = _CACHES.get(key)
+        if cache is None:
+            cache = EmbeddingCache(path, max_bytes)
+            _CACHES[key] = cache
+    return cache
+
+
+def _http_client(provider: str, credential: str, concurrency: int) -> httpx.Client:
+    # One pooled client per provider endpoint/key, shared by every run in the process.
+    key = (provider, credential, concurrency)
+    with _SHARED_LOCK:
+        client = _HTTP_CLIENTS.get(key)
+        if client is None:
+            headers = {"Authorization": f"Bearer {credential}"} if provider == "openai" else {}
+            client = httpx.Client(
+                timeout=60,
+                headers=headers,
+                limits=httpx.Limits(
+                    max_connections=concurrency, max_keepalive_connections=concurrency
+                ),
+            )
+            _HTTP_CLIENTS[key] = client
+    return client
+
+
+def _provider_embedder(config: Config) -> MatrixEmbedder:
     if config.openai_api_key:
         return _openai_embedder(config)
     if config.ollama_endpoint:
@@ -19,66 +101,159 @@ def get_embedder() -> Callable[[list[str]], list[list[float]]]:
     )
 
 
-def _openai_embedder(config: Config) -> Callable[[list[str]], list[list[float]]]:
-    def embed(texts: list[str]) -> list[list[float]]:
-        if not texts:
-            return []
+def _openai_embedder(config: Config) -> MatrixEmbedder:
+    concurrency = max(1, config.embed_concurrency)
+    client = _http_client("openai", config.openai_api_key, concurrency)
+
+    def embed_batch(batch: list[str]) -> np.ndarray:
         payload = {
             "model": config.embed_model,
-            "input": texts,
+            "input": batch,
             "encoding_format": "float",
         }
-        headers = {"Authorization": f"Bearer {config.openai_api_key}"}
-        with httpx.Client(timeout=60) as client:
-            response = client.post(
-                "https://api.openai.com/v1/embeddings",
-                headers=headers,
-                json=payload,
-            )
-            response.raise_for_status()
-            data = response.json()
-
+        data = _openai_post_with_retry(client, payload)
         items = data.get("data", [])
         items.sort(key=lambda item: item.get("index", 0))
         vectors = [item.get("embedding") for item in items]
+        if len(vectors) != len(batch):
+            raise ValueError("OpenAI embeddings response size mismatch.")
         _validate_vectors(vectors)
-        if len(vectors) != len(texts):
+        return as_matrix(vectors)
+
+    def embed(texts: list[str]) -> np.ndarray:
+        if not texts:
+            return _empty_matrix()
+        increment("embeddings_computed", len(texts))
+        batches = _split_batches(
+            texts, config.embed_batch_size, config.embed_batch_max_tokens
+        )
+        matrix = _stack(_map_ordered(embed_batch, batches, concurrency))
+        if matrix.shape[0] != len(texts):
             raise ValueError("OpenAI embeddings response size mismatch.")
-        return vectors
+        return matrix
 
     return embed
 
 
-def _ollama_embedder(config: Config) -> Callable[[list[str]], list[list[float]]]:
+def _openai_post_with_retry(client: httpx.Client, payload: dict[str, Any]) -> dict[str, Any]:
+    attempts = 5
+    for attempt in range(attempts):
+        try:
+            with timed("embed_request", provider="openai"):
+                response = client.post(_OPENAI_EMBEDDINGS_URL, json=payload)
+        except httpx.TransportError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.5 * (2**attempt))
+            continue
+        if response.status_code in _RETRYABLE_STATUS and attempt < attempts - 1:
+            time.sleep(_retry_delay(response, attempt))
+            continue
+        response.raise_for_status()
+        return response.json()
+    raise RuntimeError("Failed to fetch OpenAI embeddings.")
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    retry_after = response.headers.get("retry-after")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+    return 0.5 * (2**attempt)
+
+
+def _split_batches(texts: list[str], max_items: int, max_tokens: int) -> list[list[str]]:
+    batches: list[list[str]] = []
+    current: list[str] = []
+    current_tokens = 0
+    for text in texts:
+        tokens = _estimate_tokens(text)
+        if current and (
+            len(current) >= max_items or current_tokens + tokens > max_tokens
+        ):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 3 + 1
+
+
+def _ollama_embedder(config: Config) -> MatrixEmbedder:
     endpoint = config.ollama_endpoint.rstrip("/")
     url = f"{endpoint}/api/embeddings"
+    batch_url = f"{endpoint}/api/embed"
+    concurrency = max(1, config.embed_concurrency)
+    mode = config.ollama_embed_mode
+    if mode not in {"auto", "batch", "single"}:
+        raise ValueError("OLLAMA_EMBED_MODE must be one of: auto, batch, single.")
+    client = _http_client("ollama", endpoint, concurrency)
+    use_batch = mode != "single"
 
-    def embed(texts: list[str]) -> list[list[float]]:
-        if not texts:
-            return []
-        vectors: list[list[float]] = []
-        with httpx.Client(timeout=60) as client:
-            for text in texts:
-                payload = {"model": config.embed_model, "prompt": text}
-                vectors.append(_ollama_post_with_retry(client, url, payload))
+    def embed_one(text: str) -> list[float]:
+        payload = {"model": config.embed_model, "prompt": text}
+        return _ollama_post_with_retry(client, url, payload)
+
+    def embed_batch(batch: list[str]) -> np.ndarray:
+        payload = {"model": config.embed_model, "input": batch}
+        vectors = _ollama_post_with_retry(client, batch_url, payload, key="embeddings")
+        if not isinstance(vectors, list) or len(vectors) != len(batch):
+            raise RuntimeError("Ollama embeddings response size mismatch.")
+        _validate_vectors(vectors)
+        return as_matrix(vectors)
+
+    def embed_singles(batch: list[str]) -> np.ndarray:
+        vectors = _map_ordered(embed_one, batch, concurrency)
         _validate_vectors(vectors)
-        return vectors
+        return as_matrix(vectors)
+
+    def embed(texts: list[str]) -> np.ndarray:
+        nonlocal use_batch
+        if not texts:
+            return _empty_matrix()
+        increment("embeddings_computed", len(texts))
+        batches = _split_batches(
+            texts, config.embed_batch_size, config.embed_batch_max_tokens
+        )
+        if use_batch:
+            try:
+                first = embed_batch(batches[0])
+                rest = _map_ordered(embed_batch, batches[1:], concurrency)
+                return _stack([first, *rest])
+            except _UnsupportedEndpoint as exc:
+                if mode == "batch":
+                    raise RuntimeError(
+                        "Ollama endpoint does not support /api/embed."
+                    ) from exc
+                use_batch = False
+        return _stack([embed_singles(batch) for batch in batches])
 
     return embed
 
 
 def _ollama_post_with_retry(
-    client: httpx.Client, url: str, payload: dict[str, str]
-) -> list[float]:
+    client: httpx.Client, url: str, payload: dict[str, Any], key: str = "embedding"
+) -> Any:
     attempts = 3
     for attempt in range(attempts):
         try:
-            response = client.post(url, json=payload)
+            with timed("embed_request", provider="ollama"):
+                response = client.post(url, json=payload)
+            if _is_missing_route(response):
+                raise _UnsupportedEndpoint(url)
             response.raise_for_status()
             data = response.json()
-            embedding = data.get("embedding")
+            embedding = data.get(key)
             if embedding is None:
-                raise ValueError("Ollama response missing 'embedding'.")
+                raise ValueError(f"Ollama response missing '{key}'.")
             return embedding
         except (httpx.HTTPError, ValueError) as exc:
             if attempt == attempts - 1:
@@ -87,6 +262,41 @@ def _ollama_post_with_retry(
     raise RuntimeError("Failed to fetch Ollama embeddings.")
 
 
+def _is_missing_route(response: httpx.Response) -> bool:
+    if response.status_code not in {404, 405}:
+        return False
+    try:
+        data = response.json()
+    except ValueError:
+        return True
+    return not (isinstance(data, dict) and "error" in data)
+
+
+class _UnsupportedEndpoint(Exception):
+    pass
+
+
+def _map_ordered(
+    func: Callable[[Any], Any], items: list[Any], concurrency: int
+) -> list[Any]:
+    if len(items) <= 1 or concurrency <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(items))) as pool:
+        # Each task runs in a copy of the caller's context so metrics reach the run.
+        futures = [pool.submit(copy_context().run, func, item) for item in items]
+        return [future.result() for future in futures]
+
+
+def _stack(matrices: list[np.ndarray]) -> np.ndarray:
+    if len({matrix.shape[1] for matrix in matrices}) > 1:
+        raise ValueError("Embedding vectors have inconsistent dimensions.")
+    return np.concatenate(matrices)
+
+
+def _empty_matrix() -> np.ndarray:
+    return np.empty((0, 0), dtype=np.float32)
+
+
 def _validate_vectors(vectors: list[list[float] | None]) -> None:
     if not vectors:
         raise ValueError("No embedding vectors returned.")
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable
+
+import numpy as np
+
+from src.metrics import increment
+from src.normalize import normalize_name
+
+
+_LOOKUP_CHUNK = 500
+_EVICT_CHUNK = 1_000
+
+
+class EmbeddingCache:
+    def __init__(self, path: str | Path, max_bytes: int) -> None:
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self._path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (model, key))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+        # Tracked in memory so writes do not rescan the table to enforce the budget.
+        self._bytes = int(
+            self._conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()[0]
+        )
+
+    def get_many(self, model: str, keys: Iterable[str]) -> dict[str, np.ndarray]:
+        found: dict[str, np.ndarray] = {}
+        unique = list(dict.fromkeys(keys))
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(unique), _LOOKUP_CHUNK):
+                chunk = unique[start : start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" for _ in chunk)
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({placeholders})",
+                    (model, *chunk),
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = _decode(blob)
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE model = ? AND key = ?",
+                        [(now, model, key) for key, _ in rows],
+                    )
+            self._conn.commit()
+        return found
+
+    def put_many(self, model: str, items: dict[str, np.ndarray]) -> None:
+        if not items:
+            return
+        now = time.time()
+        encoded = {key: _encode(vector) for key, vector in items.items()}
+        with self._lock:
+            replaced = 0
+            keys = list(encoded)
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[start : start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" for _ in chunk)
+                replaced += self._conn.execute(
+                    f"SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings WHERE model = ? AND key IN ({placeholders})",
+                    (model, *chunk),
+                ).fetchone()[0]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, key, vector, last_used) VALUES (?, ?, ?, ?)",
+                [(model, key, blob, now) for key, blob in encoded.items()],
+            )
+            self._conn.commit()
+            self._bytes += sum(len(blob) for blob in encoded.values()) - replaced
+            self._evict()
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._bytes
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self) -> None:
+        if self._max_bytes <= 0:
+            return
+        excess = self._bytes - self._max_bytes
+        if excess <= 0:
+            return
+        victims: list[tuple[int]] = []
+        cursor = self._conn.execute(
+            "SELECT rowid, LENGTH(vector) FROM embeddings ORDER BY last_used, rowid"
+        )
+        while excess > 0:
+            rows = cursor.fetchmany(_EVICT_CHUNK)
+            if not rows:
+                break
+            for rowid, size in rows:
+                victims.append((rowid,))
+                excess -= size
+                self._bytes -= size
+                if excess <= 0:
+                    break
+        self._conn.executemany("DELETE FROM embeddings WHERE rowid = ?", victims)
+        self._conn.commit()
+
+
+class CachedEmbedder:
+    def __init__(
+        self,
+        embed: Callable[[list[str]], np.ndarray],
+        cache: EmbeddingCache,
+        model: str,
+    ) -> None:
+        self._embed = embed
+        self._cache = cache
+        self._model = model
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, texts: list[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        keys = [normalize_name(text) for text in texts]
+        vectors = self._cache.get_many(self._model, keys)
+        missing = [key for key in dict.fromkeys(keys) if key not in vectors]
+        self.hits += len(vectors)
+        self.misses += len(missing)
+        increment("embedding_cache_hits", len(vectors))
+        increment("embedding_cache_misses", len(missing))
+        if missing:
+            fresh = self._embed(missing)
+            if len(fresh) != len(missing):
+                raise ValueError("Embedding response size mismatch.")
+            new_items = dict(zip(missing, fresh, strict=True))
+            self._cache.put_many(self._model, new_items)
+            vectors.update(new_items)
+        dims = {vector.shape[0] for vector in vectors.values()}
+        if len(dims) != 1:
+            raise ValueError("Cached embeddings have inconsistent dimensions.")
+        matrix = np.empty((len(keys), dims.pop()), dtype=np.float32)
+        for row, key in enumerate(keys):
+            matrix[row] = vectors[key]
+        return matrix
+
+
+def _encode(vector: np.ndarray) -> bytes:
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def _decode(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.float32).copy()
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import csv
-from itertools import combinations
+from collections import Counter
 from pathlib import Path
 from typing import Any
 
@@ -17,28 +17,92 @@ def evaluate_if_available(
         return None
 
     gold_group = _load_gold_groups(path)
+    metrics = clustering_metrics(
+        _labels_from_mapping(mapping), _labels_from_groups(gold_group)
+    )
+
+    print(
+        "Evaluation metrics: "
+        f"precision={metrics['precision']:.3f} recall={metrics['recall']:.3f} "
+        f"f1={metrics['f1']:.3f} bcubed_f1={metrics['bcubed_f1']:.3f} "
+        f"ari={metrics['adjusted_rand_index']:.3f}"
+    )
+    return metrics
 
-    predicted_pairs = _pairs_from_mapping(mapping)
-    gold_pairs = _pairs_from_groups(gold_group)
 
-    true_positive = len(predicted_pairs & gold_pairs)
-    precision = _safe_divide(true_positive, len(predicted_pairs))
-    recall = _safe_divide(true_positive, len(gold_pairs))
+def load_gold_labels(gold_path: str | Path) -> dict[Any, str] | None:
+    path = Path(gold_path)
+    if not path.exists():
+        return None
+    return _labels_from_groups(_load_gold_groups(path))
+
+
+def clustering_metrics(
+    predicted: dict[Any, Any], gold: dict[Any, Any]
+) -> dict[str, float]:
+    predicted_sizes = Counter(predicted.values())
+    gold_sizes = Counter(gold.values())
+    cells = Counter(
+        (label, gold[item]) for item, label in predicted.items() if item in gold
+    )
+    common_predicted: Counter[Any] = Counter()
+    common_gold: Counter[Any] = Counter()
+    for (predicted_label, gold_label), count in cells.items():
+        common_predicted[predicted_label] += count
+        common_gold[gold_label] += count
+
+    predicted_pairs = sum(_pairs(size) for size in predicted_sizes.values())
+    gold_pairs = sum(_pairs(size) for size in gold_sizes.values())
+    true_positive = sum(_pairs(count) for count in cells.values())
+    precision = _safe_divide(true_positive, predicted_pairs)
+    recall = _safe_divide(true_positive, gold_pairs)
     f1 = _safe_divide(2 * precision * recall, precision + recall)
 
-    metrics = {
+    common = sum(cells.values())
+    bcubed_precision = _safe_divide(
+        sum(count * count / common_predicted[p] for (p, _), count in cells.items()),
+        common,
+    )
+    bcubed_recall = _safe_divide(
+        sum(count * count / common_gold[g] for (_, g), count in cells.items()),
+        common,
+    )
+    bcubed_f1 = _safe_divide(
+        2 * bcubed_precision * bcubed_recall, bcubed_precision + bcubed_recall
+    )
+
+    return {
         "precision": precision,
         "recall": recall,
         "f1": f1,
-        "predicted_pairs": float(len(predicted_pairs)),
-        "gold_pairs": float(len(gold_pairs)),
+        "predicted_pairs": float(predicted_pairs),
+        "gold_pairs": float(gold_pairs),
+        "bcubed_precision": bcubed_precision,
+        "bcubed_recall": bcubed_recall,
+        "bcubed_f1": bcubed_f1,
+        "adjusted_rand_index": _adjusted_rand_index(
+            cells, common_predicted, common_gold, common
+        ),
     }
 
-    print(
-        "Evaluation metrics: "
-        f"precision={precision:.3f} recall={recall:.3f} f1={f1:.3f}"
-    )
-    return metrics
+
+def _adjusted_rand_index(
+    cells: Counter[tuple[Any, Any]],
+    predicted_sizes: Counter[Any],
+    gold_sizes: Counter[Any],
+    total: int,
+) -> float:
+    total_pairs = _pairs(total)
+    if total_pairs == 0:
+        return 0.0
+    index = sum(_pairs(count) for count in cells.values())
+    predicted_sum = sum(_pairs(size) for size in predicted_sizes.values())
+    gold_sum = sum(_pairs(size) for size in gold_sizes.values())
+    expected = predicted_sum * gold_sum / total_pairs
+    maximum = (predicted_sum + gold_sum) / 2
+    if maximum == expected:
+        return 1.0
+    return (index - expected) / (maximum - expected)
 
 
 def _load_gold_groups(path: Path) -> dict[str, list[Any]]:
@@ -60,30 +124,27 @@ def _load_gold_groups(path: Path) -> dict[str, list[Any]]:
     return groups
 
 
-def _pairs_from_mapping(mapping: dict[Any, dict[str, Any]]) -> set[tuple[Any, Any]]:
-    grouped: dict[str, list[Any]] = {}
-    for member_id, entry in mapping.items():
-        cluster_id = entry.get("cluster_id")
-        if cluster_id is None:
-            continue
-        grouped.setdefault(str(cluster_id), []).append(member_id)
+def _labels_from_mapping(mapping: dict[Any, dict[str, Any]]) -> dict[Any, str]:
+    return {
+        member_id: str(entry["cluster_id"])
+        for member_id, entry in mapping.items()
+        if entry.get("cluster_id") is not None
+    }
+
 
-    pairs: set[tuple[Any, Any]] = set()
-    for members in grouped.values():
-        for left, right in combinations(sorted(members, key=str), 2):
-            pairs.add((left, right))
-    return pairs
+def _labels_from_groups(groups: dict[str, list[Any]]) -> dict[Any, str]:
+    labels: dict[Any, str] = {}
+    for group_id, members in groups.items():
+        for member in members:
+            labels.setdefault(member, group_id)
+    return labels
 
 
-def _pairs_from_groups(groups: dict[str, list[Any]]) -> set[tuple[Any, Any]]:
-    pairs: set[tuple[Any, Any]] = set()
-    for members in groups.values():
-        for left, right in combinations(sorted(members, key=str), 2):
-            pairs.add((left, right))
-    return pairs
+def _pairs(size: int) -> int:
+    return size * (size - 1) // 2
 
 
-def _safe_divide(numerator: int, denominator: int) -> float:
+def _safe_divide(numerator: float, denominator: float) -> float:
     if denominator == 0:
         return 0.0
     return numerator / denominator
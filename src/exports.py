@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import csv
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from src.records import RecordBatch, names_by_id
+
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+
+_WRITE_BUFFER = 1024 * 1024
+_PARQUET_ROW_GROUP = 65_536
+
+_COLUMNS = {
+    "mapping": (
+        ("id", "id"),
+        ("company_name", "str"),
+        ("cluster_id", "str"),
+        ("canonical_name", "str"),
+    ),
+    "clusters": (
+        ("cluster_id", "str"),
+        ("canonical_name", "str"),
+        ("size", "int"),
+        ("member_ids", "ids"),
+    ),
+    "pairs": (("id1", "id"), ("id2", "id"), ("score", "float")),
+}
+
+
+def parse_export_formats(spec: str) -> tuple[str, ...]:
+    formats = tuple(
+        dict.fromkeys(part.strip().lower() for part in spec.split(",") if part.strip())
+    )
+    check_export_formats(formats)
+    return formats
+
+
+def check_export_formats(formats: Iterable[str]) -> None:
+    unknown = [fmt for fmt in formats if fmt not in EXPORT_FORMATS]
+    if unknown:
+        raise ValueError(
+            f"Unknown export format(s) {', '.join(unknown)}; "
+            f"choose from {', '.join(EXPORT_FORMATS)}."
+        )
+    if "parquet" in formats:
+        _import_pyarrow()
+
+
+def write_exports(
+    directory: Path,
+    stem: str,
+    formats: Iterable[str],
+    companies: RecordBatch | list[dict[str, Any]],
+    pairs: list[tuple[Any, Any, float]],
+    mapping: dict[Any, dict[str, Any]],
+) -> list[Path]:
+    directory.mkdir(parents=True, exist_ok=True)
+    id_to_name = names_by_id(companies)
+    int_ids = all(type(point_id) is int for point_id in id_to_name)
+    tables = {
+        "mapping": lambda: _mapping_rows(mapping, id_to_name),
+        "clusters": lambda: _cluster_rows(mapping),
+        "pairs": lambda: iter(pairs),
+    }
+    written: list[Path] = []
+    for fmt in formats:
+        for table, rows in tables.items():
+            path = directory / f"{stem}_{table}.{fmt}"
+            _WRITERS[fmt](path, _COLUMNS[table], rows(), int_ids)
+            written.append(path)
+    return written
+
+
+def _mapping_rows(
+    mapping: dict[Any, dict[str, Any]], id_to_name: dict[Any, str]
+) -> Iterator[tuple[Any, ...]]:
+    for point_id, entry in mapping.items():
+        yield (
+            point_id,
+            id_to_name.get(point_id),
+            entry["cluster_id"],
+            entry["canonical_name"],
+        )
+
+
+def _cluster_rows(mapping: dict[Any, dict[str, Any]]) -> Iterator[tuple[Any, ...]]:
+    seen: set[str] = set()
+    for entry in mapping.values():
+        cluster_id = entry["cluster_id"]
+        if cluster_id in seen:
+            continue
+        seen.add(cluster_id)
+        member_ids = [member["id"] for member in entry.get("members", [])]
+        yield (cluster_id, entry["canonical_name"], len(member_ids), member_ids)
+
+
+def _write_csv(
+    path: Path,
+    columns: tuple[tuple[str, str], ...],
+    rows: Iterator[tuple[Any, ...]],
+    int_ids: bool,
+) -> None:
+    with open(path, "w", encoding="utf-8", newline="", buffering=_WRITE_BUFFER) as out:
+        writer = csv.writer(out)
+        writer.writerow([name for name, _ in columns])
+        writer.writerows(
+            tuple(json.dumps(value) if isinstance(value, list) else value for value in row)
+            for row in rows
+        )
+
+
+def _write_jsonl(
+    path: Path,
+    columns: tuple[tuple[str, str], ...],
+    rows: Iterator[tuple[Any, ...]],
+    int_ids: bool,
+) -> None:
+    names = [name for name, _ in columns]
+    with open(path, "w", encoding="utf-8", buffering=_WRITE_BUFFER) as out:
+        out.writelines(
+            json.dumps(dict(zip(names, row, strict=True)), ensure_ascii=False) + "\n"
+            for row in rows
+        )
+
+
+def _write_parquet(
+    path: Path,
+    columns: tuple[tuple[str, str], ...],
+    rows: Iterator[tuple[Any, ...]],
+    int_ids: bool,
+) -> None:
+    pa, pq = _import_pyarrow()
+    id_type = pa.int64() if int_ids else pa.string()
+    types = {
+        "id": id_type,
+        "ids": pa.list_(id_type),
+        "str": pa.string(),
+        "int": pa.int64(),
+        "float": pa.float64(),
+    }
+    schema = pa.schema([(name, types[kind]) for name, kind in columns])
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        while chunk := list(islice(rows, _PARQUET_ROW_GROUP)):
+            data = {
+                name: [
+                    _stringify_ids(row[index])
+                    if not int_ids and kind in ("id", "ids")
+                    else row[index]
+                    for row in chunk
+                ]
+                for index, (name, kind) in enumerate(columns)
+            }
+            writer.write_table(pa.Table.from_pydict(data, schema=schema))
+
+
+def _import_pyarrow() -> tuple[Any, Any]:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow).") from exc
+    return pa, pq
+
+
+def _stringify_ids(value: Any) -> Any:
+    if isinstance(value, list):
+        return [str(item) for item in value]
+    return str(value)
+
+
+_WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl, "parquet": _write_parquet}
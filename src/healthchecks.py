@@ -1,10 +1,35 @@
 from __future__ import annotations
 
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from pathlib import Path
+from typing import Any, Callable
 
 import httpx
 
-from src.config import Config
+from src.config import LOCAL_QDRANT_URL, Config
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    name: str
+    ok: bool
+    error: str | None
+    checked_at: float
+    latency_ms: float
+
+
+_HTTP = httpx.Client(timeout=10.0)
+_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="dedupe-health")
+_RESULTS: dict[tuple[str, str], ProbeResult] = {}
+_INFLIGHT: dict[tuple[str, str], Future[ProbeResult]] = {}
+_LOCK = threading.Lock()
+_REFRESHER: threading.Thread | None = None
+_LOG = logging.getLogger(__name__)
 
 
 def ensure_data_files(paths: list[Path]) -> None:
@@ -13,31 +38,74 @@ def ensure_data_files(paths: list[Path]) -> None:
         raise FileNotFoundError(f"Missing data files: {', '.join(missing)}")
 
 
-def check_qdrant(url: str) -> None:
-    endpoint = url.rstrip("/") + "/collections"
+def run_health_checks(config: Config, *, embedding: bool = True) -> str:
+    provider = embedding_provider(config) if embedding else "external"
+    for result in _probe_all(config, max_age=config.health_ttl_seconds, embedding=embedding):
+        if not result.ok:
+            raise RuntimeError(result.error)
+    return provider
+
+
+def health_status(config: Config) -> dict[str, Any]:
     try:
-        response = httpx.get(endpoint, timeout=5.0)
-        response.raise_for_status()
-    except httpx.HTTPError as exc:
-        raise RuntimeError("Qdrant is not reachable. Check QDRANT_URL.") from exc
+        results = _probe_all(config, max_age=config.health_ttl_seconds)
+    except RuntimeError as exc:
+        return {"ok": False, "error": str(exc), "checks": {}}
+    return {
+        "ok": all(result.ok for result in results),
+        "checks": {result.name: asdict(result) for result in results},
+    }
+
+
+def start_health_refresh(config_factory: Callable[[], Config], interval_seconds: float) -> None:
+    global _REFRESHER
+    if interval_seconds <= 0:
+        return
+    with _LOCK:
+        if _REFRESHER is not None:
+            return
+        _REFRESHER = threading.Thread(
+            target=_refresh_forever,
+            args=(config_factory, interval_seconds),
+            name="dedupe-health-refresh",
+            daemon=True,
+        )
+    _REFRESHER.start()
+
 
+def _refresh_forever(config_factory: Callable[[], Config], interval_seconds: float) -> None:
+    while True:
+        try:
+            _probe_all(config_factory(), max_age=0.0)
+        except Exception:  # noqa: BLE001
+            # Keep refreshing; a bad config or a crashed probe must not stop the thread.
+            _LOG.exception("Health refresh failed")
+        time.sleep(interval_seconds)
 
-def check_embedding_provider(config: Config) -> str:
+
+def embedding_provider(config: Config) -> str:
     if config.openai_api_key:
-        _check_openai(config.openai_api_key)
         return "openai"
     if config.ollama_endpoint:
-        _check_ollama(config.ollama_endpoint)
         return "ollama"
     raise RuntimeError(
         "No embedding provider configured. Set OPENAI_API_KEY or OLLAMA_ENDPOINT."
     )
 
 
+def check_qdrant(url: str) -> None:
+    endpoint = url.rstrip("/") + "/collections"
+    try:
+        response = _HTTP.get(endpoint, timeout=5.0)
+        response.raise_for_status()
+    except httpx.HTTPError as exc:
+        raise RuntimeError("Qdrant is not reachable. Check QDRANT_URL.") from exc
+
+
 def _check_openai(api_key: str) -> None:
     headers = {"Authorization": f"Bearer {api_key}"}
     try:
-        response = httpx.get(
+        response = _HTTP.get(
             "https://api.openai.com/v1/models", headers=headers, timeout=10.0
         )
         response.raise_for_status()
@@ -48,7 +116,63 @@ def _check_openai(api_key: str) -> None:
 def _check_ollama(endpoint: str) -> None:
     url = endpoint.rstrip("/") + "/api/tags"
     try:
-        response = httpx.get(url, timeout=5.0)
+        response = _HTTP.get(url, timeout=5.0)
         response.raise_for_status()
     except httpx.HTTPError as exc:
         raise RuntimeError("Ollama endpoint is not reachable.") from exc
+
+
+def _probes(config: Config, embedding: bool) -> dict[tuple[str, str], Callable[[], None]]:
+    probes: dict[tuple[str, str], Callable[[], None]] = {}
+    if embedding and embedding_provider(config) == "openai":
+        key_digest = hashlib.sha256(config.openai_api_key.encode("utf-8")).hexdigest()[:16]
+        probes[("openai", key_digest)] = lambda: _check_openai(config.openai_api_key)
+    elif embedding:
+        probes[("ollama", config.ollama_endpoint)] = lambda: _check_ollama(
+            config.ollama_endpoint
+        )
+    # The in-process Qdrant has no HTTP endpoint to probe.
+    if config.search_backend == "qdrant" and config.qdrant_url != LOCAL_QDRANT_URL:
+        probes[("qdrant", config.qdrant_url)] = lambda: check_qdrant(config.qdrant_url)
+    return probes
+
+
+def _probe_all(config: Config, max_age: float, embedding: bool = True) -> list[ProbeResult]:
+    now = time.time()
+    futures: dict[tuple[str, str], Future[ProbeResult]] = {}
+    cached: dict[tuple[str, str], ProbeResult] = {}
+    with _LOCK:
+        for key, probe in _probes(config, embedding).items():
+            result = _RESULTS.get(key)
+            # Failures are never served from cache so a recovered service is seen at once.
+            if result is not None and result.ok and now - result.checked_at <= max_age:
+                cached[key] = result
+                continue
+            future = _INFLIGHT.get(key)
+            if future is None:
+                future = _POOL.submit(_run_probe, key, probe)
+                _INFLIGHT[key] = future
+            futures[key] = future
+    for key, future in futures.items():
+        cached[key] = future.result()
+    return list(cached.values())
+
+
+def _run_probe(key: tuple[str, str], probe: Callable[[], None]) -> ProbeResult:
+    started = time.perf_counter()
+    error = None
+    try:
+        probe()
+    except RuntimeError as exc:
+        error = str(exc)
+    result = ProbeResult(
+        name=key[0],
+        ok=error is None,
+        error=error,
+        checked_at=time.time(),
+        latency_ms=(time.perf_counter() - started) * 1000,
+    )
+    with _LOCK:
+        _RESULTS[key] = result
+        _INFLIGHT.pop(key, None)
+    return result
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.records import RecordBatch, iter_rows
+
+
+_REVERSE_LOOKUP_MAX = 2_000
+
+
+@dataclass
+class IncrementalPlan:
+    changed: list[dict[str, Any]]
+    deleted: list[Any]
+    requery: list[Any]
+    stored_neighbors: dict[Any, list[list[Any]]] = field(default_factory=dict)
+
+    @property
+    def affected(self) -> set[Any]:
+        return {row["id"] for row in self.changed} | set(self.requery)
+
+
+def content_hash(point_id: Any, company_name: str) -> str:
+    digest = hashlib.sha1(f"{point_id}\x1f{company_name}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def plan_incremental(
+    rows: RecordBatch | list[dict[str, Any]],
+    existing: dict[Any, dict[str, Any]],
+    top_k: int | None = None,
+) -> IncrementalPlan:
+    current_ids = {row["id"] for row in iter_rows(rows)}
+    changed = [
+        row
+        for row in iter_rows(rows)
+        if (existing.get(row["id"]) or {}).get("content_hash")
+        != content_hash(row["id"], row["company_name"])
+    ]
+    deleted = [point_id for point_id in existing if point_id not in current_ids]
+    stale = {row["id"] for row in changed} | set(deleted)
+
+    requery: list[Any] = []
+    stored_neighbors: dict[Any, list[list[Any]]] = {}
+    for row in iter_rows(rows):
+        point_id = row["id"]
+        if point_id in stale:
+            continue
+        payload = existing[point_id]
+        neighbors = payload.get("neighbors")
+        if top_k is not None and isinstance(neighbors, list):
+            # Neighbors stored by a wider search can serve a narrower one.
+            stored_k = payload.get("neighbors_top_k")
+            if isinstance(stored_k, int) and stored_k >= top_k:
+                neighbors = neighbors[:top_k]
+            else:
+                neighbors = None
+        if not isinstance(neighbors, list) or any(
+            neighbor_id in stale for neighbor_id, _ in neighbors
+        ):
+            requery.append(point_id)
+        else:
+            stored_neighbors[point_id] = neighbors
+    if len(changed) > _REVERSE_LOOKUP_MAX:
+        # Too many changes to check unchanged points against them cheaply.
+        requery.extend(stored_neighbors)
+        stored_neighbors = {}
+    return IncrementalPlan(
+        changed=changed,
+        deleted=deleted,
+        requery=requery,
+        stored_neighbors=stored_neighbors,
+    )
+
+
+def neighbor_payloads(
+    neighbor_results: list[dict[str, Any]], point_ids: set[Any], top_k: int
+) -> dict[Any, dict[str, Any]]:
+    neighbors: dict[Any, list[list[Any]]] = {point_id: [] for point_id in point_ids}
+    for result in neighbor_results:
+        point_id = result.get("id")
+        if point_id in neighbors:
+            neighbors[point_id].append([result["neighbor_id"], float(result["score"])])
+    return {
+        point_id: {"neighbors": items, "neighbors_top_k": top_k}
+        for point_id, items in neighbors.items()
+    }
+
+
+def merge_reverse_neighbors(
+    plan: IncrementalPlan, reverse_results: list[dict[str, Any]], top_k: int
+) -> dict[Any, dict[str, Any]]:
+    # reverse_results hold each unchanged point's best matches among the new or
+    # changed points; any that beat its stored k-th score join its neighbors.
+    touched: set[Any] = set()
+    for result in reverse_results:
+        target = result.get("id")
+        neighbors = plan.stored_neighbors.get(target)
+        if neighbors is None:
+            continue
+        score = float(result["score"])
+        if len(neighbors) >= top_k and score <= neighbors[-1][1]:
+            continue
+        neighbors.append([result["neighbor_id"], score])
+        neighbors.sort(key=lambda item: item[1], reverse=True)
+        del neighbors[top_k:]
+        touched.add(target)
+    return {
+        point_id: {"neighbors": plan.stored_neighbors[point_id], "neighbors_top_k": top_k}
+        for point_id in touched
+    }
+
+
+def stored_neighbor_records(
+    plan: IncrementalPlan, id_to_name: dict[Any, str]
+) -> list[dict[str, Any]]:
+    return [
+        {
+            "id": point_id,
+            "company_name": id_to_name.get(point_id),
+            "neighbor_id": neighbor_id,
+            "neighbor_name": id_to_name.get(neighbor_id),
+            "score": score,
+        }
+        for point_id, neighbors in plan.stored_neighbors.items()
+        for neighbor_id, score in neighbors
+    ]
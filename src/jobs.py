@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable
+
+
+_STAGE_RE = re.compile(r"^\[\s*[\d.]+s\] (.+)$")
+_FINISHED = ("succeeded", "failed")
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+class Job:
+    def __init__(self, job_id: str) -> None:
+        self.id = job_id
+        self.status = "queued"
+        self.stage: str | None = None
+        self.stages: list[str] = []
+        self.logs: list[str] = []
+        self.error: str | None = None
+        self.result: dict[str, Any] | None = None
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self._changed = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in _FINISHED
+
+    def log(self, message: str) -> None:
+        with self._changed:
+            self.logs.append(message)
+            match = _STAGE_RE.match(message)
+            if match:
+                self.stage = match.group(1)
+                self.stages.append(self.stage)
+            self._changed.notify_all()
+
+    def wait_for_logs(self, cursor: int, timeout: float) -> tuple[list[str], bool]:
+        with self._changed:
+            if len(self.logs) <= cursor and not self.done:
+                self._changed.wait(timeout)
+            return self.logs[cursor:], self.done
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._changed:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "stage": self.stage,
+                "stages_completed": max(len(self.stages) - (0 if self.done else 1), 0),
+                "logs": len(self.logs),
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "result": self.result,
+            }
+
+    def _set_status(self, status: str, **fields: Any) -> None:
+        with self._changed:
+            self.status = status
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self._changed.notify_all()
+
+
+class JobManager:
+    def __init__(self, workers: int, queue_depth: int, keep_finished: int = 200) -> None:
+        self._workers = max(1, workers)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self._workers, thread_name_prefix="dedupe-job"
+        )
+        self._queue_depth = max(0, queue_depth)
+        self._keep_finished = keep_finished
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, run: Callable[[Callable[[str], None]], dict[str, Any]]) -> Job:
+        with self._lock:
+            # Jobs beyond the worker count wait; only the waiting ones count toward depth.
+            active = sum(1 for job in self._jobs.values() if not job.done)
+            if active >= self._workers + self._queue_depth:
+                raise QueueFullError("Too many runs are waiting; try again shortly.")
+            job = Job(uuid.uuid4().hex)
+            self._jobs[job.id] = job
+            self._prune()
+        self._pool.submit(self._execute, job, run)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            counts = {"queued": 0, "running": 0, "succeeded": 0, "failed": 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _execute(
+        self, job: Job, run: Callable[[Callable[[str], None]], dict[str, Any]]
+    ) -> None:
+        job._set_status("running", started_at=time.time())
+        try:
+            result = run(job.log)
+        except Exception as exc:  # noqa: BLE001
+            job._set_status("failed", error=str(exc), finished_at=time.time())
+            return
+        job._set_status(
+            "succeeded", result=_summarize(result), finished_at=time.time()
+        )
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[: max(0, len(finished) - self._keep_finished)]:
+            del self._jobs[job_id]
+
+
+def _summarize(result: dict[str, Any]) -> dict[str, Any]:
+    summary: dict[str, Any] = {}
+    for key in ("report_path", "exports", "metrics", "run_summary"):
+        value = result.get(key)
+        if isinstance(value, Path):
+            value = value.name
+        elif isinstance(value, list):
+            value = [item.name if isinstance(item, Path) else item for item in value]
+        summary[key] = value
+    return summary
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable
+
+from src.uploads import PARTIAL_SUFFIX, is_partial
+
+
+_VECTOR_BYTES = 4
+
+
+class LifecycleManager:
+    def __init__(
+        self,
+        db_path: Path,
+        directories: list[Path],
+        ttl_seconds: float,
+        max_bytes: int,
+        collection_stats: Callable[[str], tuple[int, int] | None] | None = None,
+        drop_collection: Callable[[str], bool] | None = None,
+    ) -> None:
+        self._directories = directories
+        self._ttl_seconds = ttl_seconds
+        self._max_bytes = max_bytes
+        self._collection_stats = collection_stats
+        self._drop_collection = drop_collection
+        self._lock = threading.Lock()
+        self._leases: Counter[str] = Counter()
+        self._last_sweep: dict[str, Any] | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS collections ("
+            " name TEXT PRIMARY KEY,"
+            " created REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def touch(self, names: list[str]) -> None:
+        with self._lock:
+            self._touch(names)
+
+    def acquire(self, names: list[str], paths: list[Path]) -> None:
+        # Paths lease every file whose name starts with them, so a report path also
+        # covers its compressed copy and a run prefix covers that run's exports.
+        with self._lock:
+            self._touch(names)
+            self._leases.update([*names, *(str(path) for path in paths)])
+
+    def release(self, names: list[str], paths: list[Path]) -> None:
+        with self._lock:
+            self._leases.subtract([*names, *(str(path) for path in paths)])
+            self._leases += Counter()
+        self.touch(names)
+
+    def usage(self) -> dict[str, Any]:
+        collections = self._collection_usage()
+        files = self._file_usage()
+        with self._lock:
+            last_sweep = self._last_sweep
+        return {
+            "collections": collections,
+            "directories": {
+                str(directory): {
+                    "files": sum(1 for item in files if item["directory"] == str(directory)),
+                    "bytes": sum(
+                        item["bytes"] for item in files if item["directory"] == str(directory)
+                    ),
+                }
+                for directory in self._directories
+            },
+            "total_bytes": sum(item["bytes"] for item in [*collections, *files]),
+            "max_bytes": self._max_bytes,
+            "ttl_seconds": self._ttl_seconds,
+            "last_sweep": last_sweep,
+        }
+
+    def sweep(self) -> dict[str, Any]:
+        now = time.time()
+        items = [
+            {"kind": "collection", **item} for item in self._collection_usage()
+        ] + [{"kind": "file", **item} for item in self._file_usage()]
+        items.sort(key=lambda item: item["last_used"])
+        total = sum(item["bytes"] for item in items)
+        dropped: list[str] = []
+        freed = 0
+        for item in items:
+            expired = self._ttl_seconds > 0 and now - item["last_used"] > self._ttl_seconds
+            # Uploads still being written only go once they have sat idle past the TTL.
+            over_budget = (
+                self._max_bytes > 0 and total > self._max_bytes and not item["partial"]
+            )
+            if item["leased"] or not (expired or over_budget):
+                continue
+            if not self._remove(item):
+                continue
+            dropped.append(item["name"])
+            freed += item["bytes"]
+            total -= item["bytes"]
+        summary = {"at": now, "removed": dropped, "freed_bytes": freed, "total_bytes": total}
+        with self._lock:
+            self._last_sweep = summary
+        return summary
+
+    def start(self, interval_seconds: float) -> None:
+        if interval_seconds <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, args=(interval_seconds,), name="dedupe-lifecycle", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self, interval_seconds: float) -> None:
+        while not self._stop.wait(interval_seconds):
+            try:
+                self.sweep()
+            except Exception as exc:  # noqa: BLE001
+                with self._lock:
+                    self._last_sweep = {"at": time.time(), "error": str(exc)}
+
+    def _collection_usage(self) -> list[dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, created, last_used FROM collections ORDER BY last_used"
+            ).fetchall()
+            leases = set(self._leases)
+        usage = []
+        for name, created, last_used in rows:
+            stats = self._collection_stats(name) if self._collection_stats else (0, 0)
+            if stats is None:
+                if name not in leases:
+                    self._forget(name)
+                continue
+            points, dim = stats
+            usage.append(
+                {
+                    "name": name,
+                    "created": created,
+                    "last_used": last_used,
+                    "points": points,
+                    "bytes": points * dim * _VECTOR_BYTES,
+                    "leased": name in leases,
+                    "partial": False,
+                }
+            )
+        return usage
+
+    def _file_usage(self) -> list[dict[str, Any]]:
+        with self._lock:
+            leases = set(self._leases)
+        usage = []
+        for directory in self._directories:
+            if not directory.is_dir():
+                continue
+            for path in directory.iterdir():
+                if not path.is_file() or path.name.endswith(PARTIAL_SUFFIX):
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                usage.append(
+                    {
+                        "name": str(path),
+                        "directory": str(directory),
+                        "created": stat.st_ctime,
+                        "last_used": stat.st_mtime,
+                        "bytes": stat.st_size,
+                        "leased": _file_leased(str(path), leases),
+                        "partial": is_partial(path),
+                    }
+                )
+        return usage
+
+    def _remove(self, item: dict[str, Any]) -> bool:
+        # A job may have leased or used the item since it was listed; acquire() waits
+        # on the lock, so checking and removing under it closes that window.
+        with self._lock:
+            if item["kind"] == "file":
+                path = Path(item["name"])
+                if _file_leased(item["name"], self._leases):
+                    return False
+                try:
+                    if path.stat().st_mtime > item["last_used"]:
+                        return False
+                except FileNotFoundError:
+                    return False
+                path.unlink(missing_ok=True)
+                Path(item["name"] + PARTIAL_SUFFIX).unlink(missing_ok=True)
+                return True
+            if self._drop_collection is None or item["name"] in self._leases:
+                return False
+            row = self._conn.execute(
+                "SELECT last_used FROM collections WHERE name = ?", (item["name"],)
+            ).fetchone()
+            if row is not None and row[0] > item["last_used"]:
+                return False
+            self._drop_collection(item["name"])
+            self._delete(item["name"])
+            return True
+
+    def _forget(self, name: str) -> None:
+        with self._lock:
+            self._delete(name)
+
+    def _touch(self, names: list[str]) -> None:
+        now = time.time()
+        self._conn.executemany(
+            "INSERT INTO collections (name, created, last_used) VALUES (?, ?, ?)"
+            " ON CONFLICT(name) DO UPDATE SET last_used = excluded.last_used",
+            [(name, now, now) for name in names],
+        )
+        self._conn.commit()
+
+    def _delete(self, name: str) -> None:
+        self._conn.execute("DELETE FROM collections WHERE name = ?", (name,))
+        self._conn.commit()
+
+
+def _file_leased(name: str, leases: Any) -> bool:
+    return any(name.startswith(lease) for lease in leases)
@@ -1,31 +1,60 @@
 import csv
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator
+
+from src.records import RecordBatch
+from src.uploads import open_text_input
 
 
 def load_companies(path: str | Path) -> list[dict[str, Any]]:
+    return load_records(path).to_rows()
+
+
+def load_records(path: str | Path) -> RecordBatch:
     resolved = Path(path)
-    rows: list[dict[str, Any]] = []
-    with resolved.open(newline="", encoding="utf-8") as handle:
-        reader = csv.DictReader(handle)
-        for row in reader:
-            raw_id = (row.get("id") or "").strip()
-            company_name = (row.get("company_name") or "").strip()
-            if raw_id == "":
-                continue
-            parsed_id: int | str
-            try:
-                parsed_id = int(raw_id)
-            except ValueError:
-                parsed_id = raw_id
-            rows.append({"id": parsed_id, "company_name": company_name})
-
-    rows.sort(key=_sort_key)
-    return rows
-
-
-def _sort_key(row: dict[str, Any]) -> tuple[int, str]:
-    value = row.get("id")
+    ids: list[int | str] = []
+    names: list[str] = []
+    with open_text_input(resolved) as handle:
+        for row in _parse_rows(csv.DictReader(handle)):
+            ids.append(row["id"])
+            names.append(row["company_name"])
+
+    order = sorted(range(len(ids)), key=lambda index: _sort_key(ids[index]))
+    return RecordBatch.from_columns(
+        [ids[index] for index in order], [names[index] for index in order]
+    )
+
+
+def iter_companies(path: str | Path, chunk_size: int) -> Iterator[list[dict[str, Any]]]:
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive.")
+    resolved = Path(path)
+    with open_text_input(resolved) as handle:
+        chunk: list[dict[str, Any]] = []
+        for row in _parse_rows(csv.DictReader(handle)):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def _parse_rows(reader: Iterable[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+    for row in reader:
+        raw_id = (row.get("id") or "").strip()
+        company_name = (row.get("company_name") or "").strip()
+        if raw_id == "":
+            continue
+        parsed_id: int | str
+        try:
+            parsed_id = int(raw_id)
+        except ValueError:
+            parsed_id = raw_id
+        yield {"id": parsed_id, "company_name": company_name}
+
+
+def _sort_key(value: int | str) -> tuple[int, str]:
     if isinstance(value, int):
         return (0, f"{value:012d}")
     return (1, str(value))
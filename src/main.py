@@ -3,7 +3,9 @@ from dataclasses import replace
 from pathlib import Path
 
 from src.config import Config
+from src.exports import parse_export_formats
 from src.pipeline import run_pipeline
+from src.sweep import parse_thresholds
 
 
 def parse_args() -> argparse.Namespace:
@@ -11,6 +13,31 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--threshold", type=float, help="Similarity threshold override")
     parser.add_argument("--top-k", type=int, help="Top-K neighbors override")
     parser.add_argument("--collection", type=str, help="Qdrant collection name override")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only embed, upsert and search rows that changed since the last run",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        help="Stream the input in chunks of this many rows (0 loads it all at once)",
+    )
+    parser.add_argument(
+        "--sweep",
+        type=parse_thresholds,
+        help="Evaluate thresholds against gold, e.g. 0.70:0.95:0.01 or 0.8,0.85,0.9",
+    )
+    parser.add_argument(
+        "--export-format",
+        type=parse_export_formats,
+        help="Write mapping, clusters and pairs as csv, jsonl and/or parquet, e.g. csv,parquet",
+    )
+    parser.add_argument(
+        "--export-dir",
+        type=str,
+        help="Directory for export files (defaults to the report directory)",
+    )
     return parser.parse_args()
 
 
@@ -22,6 +49,14 @@ def apply_overrides(config: Config, args: argparse.Namespace) -> Config:
         updates["top_k"] = args.top_k
     if args.collection is not None:
         updates["collection_name"] = args.collection
+    if args.incremental:
+        updates["incremental"] = True
+    if args.chunk_size is not None:
+        updates["stream_chunk_size"] = args.chunk_size
+    if args.export_format is not None:
+        updates["export_formats"] = args.export_format
+    if args.export_dir is not None:
+        updates["export_dir"] = args.export_dir
     if not updates:
         return config
     return replace(config, **updates)
@@ -37,6 +72,11 @@ def print_config_summary(config: Config) -> None:
     print(f"  SIM_THRESHOLD: {config.sim_threshold}")
     print(f"  TOP_K: {config.top_k}")
     print(f"  COLLECTION_NAME: {config.collection_name}")
+    print(f"  INCREMENTAL: {config.incremental}")
+    print(f"  STREAM_CHUNK_SIZE: {config.stream_chunk_size}")
+    print(f"  DEDUPE_KEY: {config.dedupe_key}")
+    print(f"  BLOCKING: {config.blocking}")
+    print(f"  EXPORT_FORMATS: {','.join(config.export_formats) or '(none)'}")
 
 
 def main() -> None:
@@ -48,6 +88,7 @@ def main() -> None:
         data_path=Path("data/companies_raw.csv"),
         report_path=Path("report.html"),
         gold_path=Path("data/companies_gold.csv"),
+        sweep=args.sweep,
         log=print,
     )
 
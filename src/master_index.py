@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from src.config import Config
+from src.embedder import MatrixEmbedder
+from src.loaders import load_records
+from src.metrics import increment
+from src.numpy_search import NumpySearchBackend
+from src.result_cache import file_digest
+from src.search import SearchBackend
+
+
+MasterLookup = Callable[[np.ndarray], list[str | None]]
+
+_EMBED_CHUNK = 10_000
+_MATRIX_CACHE_SIZE = 2
+_MATRICES: OrderedDict[str, NumpySearchBackend] = OrderedDict()
+_MATRICES_LOCK = threading.Lock()
+_SIZE_CACHE_SIZE = 16
+_SIZES: OrderedDict[str, tuple[int, int]] = OrderedDict()
+
+
+def master_digest(config: Config, master_path: Path) -> str:
+    stat = master_path.stat()
+    content = _content_digest(str(master_path.resolve()), stat.st_size, stat.st_mtime_ns)
+    return hashlib.sha256(f"{config.embed_model}\x1f{content}".encode("utf-8")).hexdigest()
+
+
+def master_collection_name(config: Config, master_path: Path) -> str:
+    return f"{config.master_collection}_{master_digest(config, master_path)[:16]}"
+
+
+def load_master_index(
+    *,
+    config: Config,
+    backend: SearchBackend,
+    master_path: Path,
+    embed: MatrixEmbedder,
+    log: Callable[[str], None],
+) -> MasterLookup | None:
+    digest = master_digest(config, master_path)
+    collection = f"{config.master_collection}_{digest[:16]}"
+
+    # The digest names the index, so a warm matrix or a full collection is reused
+    # without parsing the master file again.
+    with _MATRICES_LOCK:
+        index = _MATRICES.get(digest)
+        if index is not None:
+            _MATRICES.move_to_end(digest)
+        sizes = _SIZES.get(digest)
+    if index is not None:
+        log("Reusing in-memory master matrix.")
+    elif (
+        sizes is not None
+        and sizes[0] > config.master_matrix_max_rows
+        and backend.count_points(collection) == sizes[1]
+    ):
+        log(f"Reusing master collection '{collection}'.")
+        index = backend
+    else:
+        index = _build_master_index(config, backend, master_path, digest, collection, embed, log)
+        if index is None:
+            return None
+
+    def lookup(vectors: np.ndarray) -> list[str | None]:
+        matches = index.query_top_by_vectors(collection, vectors, top_k=1)
+        return [points[0].get("company_name") if points else None for points in matches]
+
+    return lookup
+
+
+def _build_master_index(
+    config: Config,
+    backend: SearchBackend,
+    master_path: Path,
+    digest: str,
+    collection: str,
+    embed: MatrixEmbedder,
+    log: Callable[[str], None],
+) -> SearchBackend | None:
+    master_rows = load_records(master_path)
+    log(f"Loaded {len(master_rows)} master rows from {master_path}.")
+    increment("master_rows_loaded", len(master_rows))
+    unique_ids = len(set(master_rows.id_list()))
+    with _MATRICES_LOCK:
+        _SIZES[digest] = (len(master_rows), unique_ids)
+        while len(_SIZES) > _SIZE_CACHE_SIZE:
+            _SIZES.popitem(last=False)
+    if not len(master_rows):
+        return None
+
+    if len(master_rows) <= config.master_matrix_max_rows:
+        # Small master lists stay in process memory instead of a shared collection.
+        vectors = embed(master_rows.names.tolist())
+        if not len(vectors):
+            return None
+        matrix = NumpySearchBackend(block_bytes=config.search_block_mb * 1024 * 1024)
+        matrix.ensure_collection(collection, vectors.shape[1])
+        matrix.upsert_vectors(collection, master_rows, vectors)
+        with _MATRICES_LOCK:
+            _MATRICES[digest] = matrix
+            while len(_MATRICES) > _MATRIX_CACHE_SIZE:
+                _MATRICES.popitem(last=False)
+        log(f"Embedded {len(master_rows)} master rows into an in-memory matrix.")
+        return matrix
+    if backend.count_points(collection) == unique_ids:
+        log(f"Reusing master collection '{collection}'.")
+        return backend
+
+    upserted = 0
+    for start in range(0, len(master_rows), _EMBED_CHUNK):
+        batch = master_rows[start : start + _EMBED_CHUNK]
+        vectors = embed(batch.names.tolist())
+        if not len(vectors):
+            continue
+        if upserted == 0:
+            backend.ensure_collection(collection, vectors.shape[1])
+        backend.upsert_vectors(collection, batch, vectors)
+        upserted += len(batch)
+        log(f"  upserted {upserted} master rows into '{collection}'")
+    return backend if upserted else None
+
+
+@lru_cache(maxsize=16)
+def _content_digest(path: str, size: int, mtime_ns: int) -> str:
+    return file_digest(Path(path))
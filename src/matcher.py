@@ -3,7 +3,10 @@ from __future__ import annotations
 from collections import defaultdict
 from typing import Any
 
+import numpy as np
+
 from src.normalize import normalize_name
+from src.records import RecordBatch, names_by_id
 
 
 def build_pairs(neighbor_results: list[dict[str, Any]]) -> list[tuple[Any, Any, float]]:
@@ -30,11 +33,19 @@ def _ordered_pair(id1: Any, id2: Any) -> tuple[Any, Any]:
 def cluster_candidates(
     pairs: list[tuple[Any, Any, float]], threshold: float
 ) -> list[set[Any]]:
-    uf = _UnionFind()
+    index: dict[Any, int] = {}
+    left: list[int] = []
+    right: list[int] = []
     for id1, id2, score in pairs:
         if score >= threshold:
-            uf.union(id1, id2)
-    return uf.clusters()
+            left.append(index.setdefault(id1, len(index)))
+            right.append(index.setdefault(id2, len(index)))
+    uf = UnionFind(len(index))
+    uf.union_edges(np.asarray(left, dtype=np.int64), np.asarray(right, dtype=np.int64))
+    groups: dict[int, set[Any]] = defaultdict(set)
+    for item, label in zip(index, uf.clusters().tolist()):
+        groups[label].add(item)
+    return list(groups.values())
 
 
 def choose_canonical(rows_in_cluster: list[dict[str, Any]]) -> str:
@@ -44,24 +55,28 @@ def choose_canonical(rows_in_cluster: list[dict[str, Any]]) -> str:
 
 
 def dedupe_mapping(
-    rows: list[dict[str, Any]], clusters: list[set[Any]]
+    rows: RecordBatch | list[dict[str, Any]],
+    clusters: list[set[Any]],
+    groups: dict[Any, list[Any]] | None = None,
 ) -> dict[Any, dict[str, Any]]:
     cluster_sets = [set(cluster) for cluster in clusters if cluster]
+    if groups:
+        cluster_sets = _expand_groups(cluster_sets, groups)
     seen_ids = {member for cluster in cluster_sets for member in cluster}
-    missing_ids = [row["id"] for row in rows if row["id"] not in seen_ids]
+    name_by_id = names_by_id(rows)
+    missing_ids = [point_id for point_id in name_by_id if point_id not in seen_ids]
     for missing_id in missing_ids:
         cluster_sets.append({missing_id})
 
     cluster_sets.sort(key=_cluster_sort_key)
-    row_by_id = {row["id"]: row for row in rows}
     mapping: dict[Any, dict[str, Any]] = {}
     for index, cluster in enumerate(cluster_sets, start=1):
-        cluster_rows = [row_by_id[member] for member in cluster if member in row_by_id]
-        canonical = choose_canonical(cluster_rows)
         members = [
-            {"id": row["id"], "company_name": row["company_name"]}
-            for row in cluster_rows
+            {"id": member, "company_name": name_by_id[member]}
+            for member in cluster
+            if member in name_by_id
         ]
+        canonical = choose_canonical(members)
         cluster_id = f"cluster_{index}"
         for member in cluster:
             mapping[member] = {
@@ -72,40 +87,80 @@ def dedupe_mapping(
     return mapping
 
 
+def _expand_groups(
+    cluster_sets: list[set[Any]], groups: dict[Any, list[Any]]
+) -> list[set[Any]]:
+    expanded: list[set[Any]] = []
+    covered: set[Any] = set()
+    for cluster in cluster_sets:
+        members = set(cluster)
+        for representative in cluster:
+            if representative in groups:
+                members.update(groups[representative])
+                covered.add(representative)
+        expanded.append(members)
+    expanded.extend(
+        set(group) for representative, group in groups.items() if representative not in covered
+    )
+    return expanded
+
+
 def _cluster_sort_key(cluster: set[Any]) -> tuple[str, int]:
     ordered = sorted((str(member) for member in cluster))
     return ("|".join(ordered), len(ordered))
 
 
-class _UnionFind:
-    def __init__(self) -> None:
-        self._parent: dict[Any, Any] = {}
-        self._rank: dict[Any, int] = {}
+class UnionFind:
+    def __init__(self, size: int) -> None:
+        self.parent = np.arange(size, dtype=np.int64)
+        self.rank = np.zeros(size, dtype=np.int8)
 
-    def find(self, item: Any) -> Any:
-        if item not in self._parent:
-            self._parent[item] = item
-            self._rank[item] = 0
-        if self._parent[item] != item:
-            self._parent[item] = self.find(self._parent[item])
-        return self._parent[item]
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return int(item)
 
-    def union(self, left: Any, right: Any) -> None:
+    def union(self, left: int, right: int) -> int:
         root_left = self.find(left)
         root_right = self.find(right)
         if root_left == root_right:
-            return
-        if self._rank[root_left] < self._rank[root_right]:
-            self._parent[root_left] = root_right
-        elif self._rank[root_left] > self._rank[root_right]:
-            self._parent[root_right] = root_left
-        else:
-            self._parent[root_right] = root_left
-            self._rank[root_left] += 1
-
-    def clusters(self) -> list[set[Any]]:
-        groups: dict[Any, set[Any]] = defaultdict(set)
-        for item in self._parent:
-            root = self.find(item)
-            groups[root].add(item)
-        return list(groups.values())
+            return root_left
+        if self.rank[root_left] < self.rank[root_right]:
+            root_left, root_right = root_right, root_left
+        self.parent[root_right] = root_left
+        if self.rank[root_left] == self.rank[root_right]:
+            self.rank[root_left] += 1
+        return root_left
+
+    def union_edges(self, left: np.ndarray, right: np.ndarray) -> None:
+        # Hook each root onto the smallest root it shares an edge with, then
+        # flatten; repeat until every edge joins two nodes with the same root.
+        parent = self.parent
+        while left.size:
+            self._compress()
+            root_left = parent[left]
+            root_right = parent[right]
+            pending = root_left != root_right
+            if not pending.any():
+                return
+            left, right = left[pending], right[pending]
+            root_left, root_right = root_left[pending], root_right[pending]
+            np.minimum.at(
+                parent,
+                np.maximum(root_left, root_right),
+                np.minimum(root_left, root_right),
+            )
+
+    def clusters(self) -> np.ndarray:
+        self._compress()
+        return self.parent.copy()
+
+    def _compress(self) -> None:
+        parent = self.parent
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                return
+            parent[:] = grandparent
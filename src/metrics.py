@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import numpy as np
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+STAGE_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+
+_PREFIX = "dedupe"
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def cumulative(self) -> list[int]:
+        running = 0
+        totals = []
+        for count in self.counts:
+            running += count
+            totals.append(running)
+        return totals
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "buckets": dict(zip(map(str, self.buckets), self.cumulative(), strict=True)),
+        }
+
+
+class RunMetrics:
+    def __init__(self) -> None:
+        self.stages: dict[str, float] = {}
+        self.counters: dict[str, float] = {}
+        self.histograms: dict[tuple[str, Labels], Histogram] = {}
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._stage: str | None = None
+        self._stage_started = self._started
+        self._finished: float | None = None
+
+    def start_stage(self, stage: str) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            self._close_stage(now)
+            self._stage = stage
+            self._stage_started = now
+
+    def finish(self, status: str = "succeeded") -> None:
+        now = time.perf_counter()
+        with self._lock:
+            if self._finished is not None:
+                return
+            self._close_stage(now)
+            self._finished = now
+        REGISTRY.record_run(self, status)
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float, labels: Labels = ()) -> None:
+        with self._lock:
+            histogram = self.histograms.setdefault((name, labels), Histogram())
+            histogram.observe(seconds)
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            total = (self._finished or time.perf_counter()) - self._started
+            derived = {}
+            embed_seconds = self.stages.get("embed", 0.0) + self.stages.get("stream", 0.0)
+            embed_requests = sum(
+                histogram.count
+                for (name, _), histogram in self.histograms.items()
+                if name == "embed_request"
+            )
+            if embed_seconds > 0 and embed_requests:
+                derived["embed_requests_per_second"] = round(embed_requests / embed_seconds, 3)
+            return {
+                "total_seconds": round(total, 6),
+                "stages": {stage: round(seconds, 6) for stage, seconds in self.stages.items()},
+                "counters": dict(self.counters),
+                "derived": derived,
+                "histograms": {
+                    _series_name(f"{name}_seconds", labels): histogram.to_dict()
+                    for (name, labels), histogram in self.histograms.items()
+                },
+                "peak_rss_bytes": peak_rss_bytes(),
+            }
+
+    def _close_stage(self, now: float) -> None:
+        if self._stage is not None:
+            self.stages[self._stage] = self.stages.get(self._stage, 0.0) + now - self._stage_started
+            self._stage = None
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[tuple[str, Labels], float] = {}
+        self._histograms: dict[tuple[str, Labels], Histogram] = {}
+
+    def increment(self, name: str, value: float = 1, labels: Labels = ()) -> None:
+        with self._lock:
+            key = (name, labels)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(
+        self,
+        name: str,
+        seconds: float,
+        labels: Labels = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        with self._lock:
+            histogram = self._histograms.setdefault((name, labels), Histogram(buckets))
+            histogram.observe(seconds)
+
+    def record_run(self, run: RunMetrics, status: str) -> None:
+        self.increment("runs", labels=(("status", status),))
+        for stage, seconds in run.stages.items():
+            self.observe("stage", seconds, (("stage", stage),), STAGE_BUCKETS)
+
+    def render_prometheus(self, gauges: dict[str, dict[Labels, float]] | None = None) -> str:
+        lines: list[str] = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+        seen: set[str] = set()
+        for (name, labels), value in counters:
+            metric = f"{_PREFIX}_{name}_total"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{_series_name(metric, labels)} {_format(value)}")
+        for (name, labels), histogram in histograms:
+            metric = f"{_PREFIX}_{name}_seconds"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            for bound, total in zip(histogram.buckets, histogram.cumulative(), strict=True):
+                bucket_labels = (*labels, ("le", _format(bound)))
+                lines.append(f"{_series_name(metric + '_bucket', bucket_labels)} {total}")
+            lines.append(
+                f"{_series_name(metric + '_bucket', (*labels, ('le', '+Inf')))} {histogram.count}"
+            )
+            lines.append(f"{_series_name(metric + '_sum', labels)} {_format(histogram.sum)}")
+            lines.append(f"{_series_name(metric + '_count', labels)} {histogram.count}")
+        all_gauges = {"peak_rss_bytes": {(): float(peak_rss_bytes())}, **(gauges or {})}
+        for name, series in all_gauges.items():
+            metric = f"{_PREFIX}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            for labels, value in series.items():
+                lines.append(f"{_series_name(metric, labels)} {_format(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+_CURRENT: ContextVar[RunMetrics | None] = ContextVar("dedupe_run_metrics", default=None)
+
+
+@contextmanager
+def collect(run: RunMetrics) -> Iterator[RunMetrics]:
+    token = _CURRENT.set(run)
+    try:
+        yield run
+    except BaseException:
+        run.finish("failed")
+        raise
+    finally:
+        _CURRENT.reset(token)
+    run.finish()
+
+
+def increment(name: str, value: float = 1) -> None:
+    REGISTRY.increment(name, value)
+    run = _CURRENT.get()
+    if run is not None:
+        run.increment(name, value)
+
+
+def observe(name: str, seconds: float, **labels: str) -> None:
+    key = tuple(sorted(labels.items()))
+    REGISTRY.observe(name, seconds, key)
+    run = _CURRENT.get()
+    if run is not None:
+        run.observe(name, seconds, key)
+
+
+@contextmanager
+def timed(name: str, **labels: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+def metered_embedder(
+    embed: Callable[[list[str]], np.ndarray],
+) -> Callable[[list[str]], np.ndarray]:
+    def embed_metered(texts: list[str]) -> np.ndarray:
+        increment("embeddings_requested", len(texts))
+        return embed(texts)
+
+    return embed_metered
+
+
+def write_run_summary(report_path: Path, run: RunMetrics) -> Path:
+    name = report_path.name.split(".")[0]
+    path = report_path.with_name(f"{name}_run.json")
+    path.write_text(json.dumps(run.to_dict(), indent=2, sort_keys=True), encoding="utf-8")
+    return path
+
+
+def peak_rss_bytes() -> int:
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _series_name(metric: str, labels: Labels) -> str:
+    if not labels:
+        return metric
+    rendered = ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels)
+    return f"{metric}{{{rendered}}}"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
@@ -1,9 +1,94 @@
+from __future__ import annotations
+
 import re
+import unicodedata
+from typing import Any
+
+from src.records import RecordBatch
 
 
 _WHITESPACE_RE = re.compile(r"\s+")
+_PUNCTUATION_RE = re.compile(r"[^\w\s]+")
+_LEGAL_SUFFIXES = frozenset(
+    {
+        "ab",
+        "ag",
+        "bv",
+        "co",
+        "company",
+        "corp",
+        "corporation",
+        "gmbh",
+        "inc",
+        "incorporated",
+        "limited",
+        "llc",
+        "llp",
+        "lp",
+        "ltd",
+        "nv",
+        "oy",
+        "plc",
+        "pty",
+        "sa",
+        "sarl",
+        "srl",
+    }
+)
+CANONICAL_KEY_MODES = ("none", "exact", "folded")
 
 
 def normalize_name(name: str) -> str:
     trimmed = name.strip()
     return _WHITESPACE_RE.sub(" ", trimmed)
+
+
+def canonical_key(name: str, mode: str) -> str:
+    if mode == "exact":
+        return normalize_name(name)
+    if mode == "folded":
+        return _fold_name(name)
+    raise ValueError(f"DEDUPE_KEY must be one of: {', '.join(CANONICAL_KEY_MODES)}.")
+
+
+class DuplicateCollapser:
+    def __init__(self, mode: str) -> None:
+        if mode != "none":
+            canonical_key("", mode)
+        self.mode = mode
+        self.groups: dict[Any, list[Any]] = {}
+        self._representatives: dict[str, Any] = {}
+
+    def collapse(self, rows: RecordBatch) -> RecordBatch:
+        if self.mode == "none":
+            return rows
+        keep: list[int] = []
+        for position, (point_id, name) in enumerate(
+            zip(rows.id_list(), rows.names.tolist(), strict=True)
+        ):
+            representative = self._representatives.setdefault(
+                canonical_key(name, self.mode), point_id
+            )
+            if representative == point_id:
+                keep.append(position)
+            else:
+                self.groups.setdefault(representative, [representative]).append(point_id)
+        if len(keep) == len(rows):
+            return rows
+        return rows.take(keep)
+
+
+def collapse_duplicates(
+    rows: RecordBatch, mode: str
+) -> tuple[RecordBatch, dict[Any, list[Any]]]:
+    collapser = DuplicateCollapser(mode)
+    return collapser.collapse(rows), collapser.groups
+
+
+def _fold_name(name: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    tokens = _PUNCTUATION_RE.sub(" ", stripped.casefold().replace("&", " and ")).split()
+    while len(tokens) > 1 and tokens[-1] in _LEGAL_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
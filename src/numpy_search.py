@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+import numpy as np
+
+from src.incremental import content_hash
+from src.records import RecordBatch, iter_rows
+
+
+class NumpySearchBackend:
+    label = "NumPy index"
+
+    def __init__(self, block_bytes: int = 256 * 1024 * 1024) -> None:
+        self._block_bytes = block_bytes
+        self._collections: dict[str, _Collection] = {}
+
+    def ensure_collection(self, name: str, dim: int) -> bool:
+        existing = self._collections.get(name)
+        if existing is not None and existing.dim == dim:
+            return False
+        self._collections[name] = _Collection(dim)
+        return True
+
+    def upsert_vectors(
+        self,
+        name: str,
+        rows: RecordBatch | list[dict[str, Any]],
+        vectors: np.ndarray | list[list[float]],
+    ) -> None:
+        if len(rows) != len(vectors):
+            raise ValueError("Rows and vectors length mismatch.")
+        self._collection(name).upsert(rows, _normalized(vectors))
+
+    def nearest(
+        self,
+        name: str,
+        top_k: int,
+        *,
+        id_to_vector: dict[Any, np.ndarray | list[float]] | None = None,
+        id_to_name: dict[Any, str] | None = None,
+        ids: list[Any] | None = None,
+    ) -> list[dict[str, Any]]:
+        collection = self._collection(name)
+        matrix = collection.matrix()
+        count = matrix.shape[0]
+        limit = min(top_k, count - 1)
+        if limit <= 0:
+            return []
+        if id_to_vector is None and ids is None:
+            query_rows = np.arange(count)
+        else:
+            query_ids = [*(id_to_vector or {}), *(ids or [])]
+            query_rows = np.array(
+                [
+                    collection.index[point_id]
+                    for point_id in query_ids
+                    if point_id in collection.index
+                ],
+                dtype=np.int64,
+            )
+        block = max(1, self._block_bytes // (count * matrix.itemsize))
+        results: list[dict[str, Any]] = []
+        for start in range(0, len(query_rows), block):
+            rows = query_rows[start : start + block]
+            scores = matrix[rows] @ matrix.T
+            scores[np.arange(len(rows)), rows] = -np.inf
+            top = _top_indices(scores, limit)
+            for offset, (row, neighbors) in enumerate(zip(rows.tolist(), top, strict=True)):
+                for neighbor in neighbors.tolist():
+                    results.append(
+                        {
+                            "id": collection.ids[row],
+                            "company_name": collection.names[row],
+                            "neighbor_id": collection.ids[neighbor],
+                            "neighbor_name": collection.names[neighbor],
+                            "score": float(scores[offset, neighbor]),
+                        }
+                    )
+        return results
+
+    def nearest_within(
+        self, name: str, top_k: int, *, ids: list[Any], within: list[Any]
+    ) -> list[dict[str, Any]]:
+        collection = self._collection(name)
+        matrix = collection.matrix()
+        candidates = np.array(
+            [collection.index[point_id] for point_id in within if point_id in collection.index],
+            dtype=np.int64,
+        )
+        query_rows = np.array(
+            [collection.index[point_id] for point_id in ids if point_id in collection.index],
+            dtype=np.int64,
+        )
+        limit = min(top_k, len(candidates))
+        if limit <= 0 or not len(query_rows):
+            return []
+        block = max(1, self._block_bytes // (len(candidates) * matrix.itemsize))
+        results: list[dict[str, Any]] = []
+        for start in range(0, len(query_rows), block):
+            rows = query_rows[start : start + block]
+            scores = matrix[rows] @ matrix[candidates].T
+            scores[rows[:, None] == candidates[None, :]] = -np.inf
+            top = _top_indices(scores, limit)
+            for offset, (row, neighbors) in enumerate(zip(rows.tolist(), top, strict=True)):
+                for neighbor in neighbors.tolist():
+                    if scores[offset, neighbor] == -np.inf:
+                        continue
+                    results.append(
+                        {
+                            "id": collection.ids[row],
+                            "company_name": collection.names[row],
+                            "neighbor_id": collection.ids[candidates[neighbor]],
+                            "neighbor_name": collection.names[candidates[neighbor]],
+                            "score": float(scores[offset, neighbor]),
+                        }
+                    )
+        return results
+
+    def query_top_by_vector(
+        self, name: str, vector: np.ndarray | list[float], top_k: int = 1
+    ) -> list[dict[str, Any]]:
+        collection = self._collection(name)
+        matrix = collection.matrix()
+        if matrix.shape[0] == 0 or top_k <= 0:
+            return []
+        scores = matrix @ _normalized([vector])[0]
+        top = _top_indices(scores[np.newaxis, :], min(top_k, matrix.shape[0]))[0]
+        return [
+            {
+                "id": collection.ids[index],
+                "company_name": collection.names[index],
+                "score": float(scores[index]),
+            }
+            for index in top.tolist()
+        ]
+
+    def query_top_by_vectors(
+        self, name: str, vectors: np.ndarray, top_k: int = 1
+    ) -> list[list[dict[str, Any]]]:
+        collection = self._collection(name)
+        matrix = collection.matrix()
+        limit = min(top_k, matrix.shape[0])
+        if limit <= 0:
+            return [[] for _ in range(len(vectors))]
+        queries = _normalized(vectors)
+        block = max(1, self._block_bytes // (matrix.shape[0] * matrix.itemsize))
+        results: list[list[dict[str, Any]]] = []
+        for start in range(0, len(queries), block):
+            scores = queries[start : start + block] @ matrix.T
+            top = _top_indices(scores, limit)
+            for offset, indices in enumerate(top.tolist()):
+                results.append(
+                    [
+                        {
+                            "id": collection.ids[index],
+                            "company_name": collection.names[index],
+                            "score": float(scores[offset, index]),
+                        }
+                        for index in indices
+                    ]
+                )
+        return results
+
+    def collection_stats(self, name: str) -> tuple[int, int] | None:
+        collection = self._collections.get(name)
+        return None if collection is None else (len(collection.ids), collection.dim)
+
+    def delete_collection(self, name: str) -> bool:
+        return self._collections.pop(name, None) is not None
+
+    def count_points(self, name: str) -> int | None:
+        collection = self._collections.get(name)
+        return None if collection is None else len(collection.ids)
+
+    def point_payloads(self, name: str, fields: list[str]) -> dict[Any, dict[str, Any]]:
+        collection = self._collections.get(name)
+        if collection is None:
+            return {}
+        return {
+            point_id: {key: payload[key] for key in fields if key in payload}
+            for point_id, payload in zip(collection.ids, collection.payloads, strict=True)
+        }
+
+    def delete_points(self, name: str, ids: list[Any]) -> None:
+        self._collection(name).delete(ids)
+
+    def set_payloads(self, name: str, payloads: dict[Any, dict[str, Any]]) -> None:
+        collection = self._collection(name)
+        for point_id, payload in payloads.items():
+            row = collection.index.get(point_id)
+            if row is not None:
+                collection.payloads[row].update(payload)
+
+    def _collection(self, name: str) -> _Collection:
+        collection = self._collections.get(name)
+        if collection is None:
+            raise KeyError(f"Collection '{name}' does not exist.")
+        return collection
+
+
+class _Collection:
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+        self.ids: list[Any] = []
+        self.names: list[str] = []
+        self.payloads: list[dict[str, Any]] = []
+        self.index: dict[Any, int] = {}
+        self._matrix = np.empty((0, dim), dtype=np.float32)
+        self._pending: list[np.ndarray] = []
+        self._lock = threading.RLock()
+
+    def upsert(
+        self, rows: RecordBatch | list[dict[str, Any]], vectors: np.ndarray
+    ) -> None:
+        with self._lock:
+            if vectors.shape[0] and vectors.shape[1] != self.dim:
+                raise ValueError("Vector dimension does not match collection.")
+            fresh: list[int] = []
+            updated: list[int] = []
+            updated_positions: list[int] = []
+            batch = list(iter_rows(rows))
+            # Repeated ids in one batch resolve last-write-wins, like Qdrant.
+            latest = {row["id"]: position for position, row in enumerate(batch)}
+            for point_id, position in latest.items():
+                row = batch[position]
+                payload = {
+                    "id": point_id,
+                    "company_name": row["company_name"],
+                    "content_hash": content_hash(point_id, row["company_name"]),
+                }
+                existing = self.index.get(point_id)
+                if existing is None:
+                    self.index[point_id] = len(self.ids)
+                    self.ids.append(point_id)
+                    self.names.append(row["company_name"])
+                    self.payloads.append(payload)
+                    fresh.append(position)
+                else:
+                    self.names[existing] = row["company_name"]
+                    self.payloads[existing] = payload
+                    updated.append(existing)
+                    updated_positions.append(position)
+            if updated:
+                self.matrix()[updated] = vectors[updated_positions]
+            if fresh:
+                self._pending.append(vectors[fresh])
+
+    def delete(self, ids: list[Any]) -> None:
+        with self._lock:
+            doomed = {self.index[point_id] for point_id in ids if point_id in self.index}
+            if not doomed:
+                return
+            keep = [row for row in range(len(self.ids)) if row not in doomed]
+            self._matrix = self.matrix()[keep]
+            self.ids = [self.ids[row] for row in keep]
+            self.names = [self.names[row] for row in keep]
+            self.payloads = [self.payloads[row] for row in keep]
+            self.index = {point_id: row for row, point_id in enumerate(self.ids)}
+
+    def matrix(self) -> np.ndarray:
+        with self._lock:
+            if self._pending:
+                self._matrix = np.concatenate([self._matrix, *self._pending])
+                self._pending = []
+            return self._matrix
+
+
+def _normalized(vectors: np.ndarray | list[list[float]]) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim != 2:
+        matrix = matrix.reshape(len(vectors), -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _top_indices(scores: np.ndarray, limit: int) -> np.ndarray:
+    partitioned = np.argpartition(-scores, limit - 1, axis=1)[:, :limit]
+    ordered = np.take_along_axis(scores, partitioned, axis=1)
+    order = np.argsort(-ordered, axis=1, kind="stable")
+    return np.take_along_axis(partitioned, order, axis=1)
@@ -4,20 +4,37 @@ import time
 from pathlib import Path
 from typing import Any, Callable
 
+import numpy as np
+
+from src.blocking import BLOCKING_MODES, blocked_pairs, restrict_pairs
 from src.config import Config
-from src.evaluate import evaluate_if_available
-from src.healthchecks import check_embedding_provider, check_qdrant, ensure_data_files
-from src.loaders import load_companies
+from src.evaluate import evaluate_if_available, load_gold_labels
+from src.exports import check_export_formats, write_exports
+from src.healthchecks import ensure_data_files, run_health_checks
+from src.incremental import (
+    IncrementalPlan,
+    merge_reverse_neighbors,
+    neighbor_payloads,
+    plan_incremental,
+    stored_neighbor_records,
+)
+from src.loaders import iter_companies, load_records
+from src.master_index import MasterLookup, load_master_index
 from src.matcher import build_pairs, cluster_candidates, dedupe_mapping
-from src.normalize import normalize_name
-from src.qdrant_client import (
-    ensure_collection,
-    nearest,
-    query_top_by_vector,
-    upsert_vectors,
+from src.metrics import (
+    RunMetrics,
+    collect,
+    increment,
+    metered_embedder,
+    write_run_summary,
 )
+from src.normalize import DuplicateCollapser, normalize_name
 from src.report import write_report
-from src.embedder import get_embedder
+from src.records import RecordBatch
+from src.search import SearchBackend, get_search_backend
+from src.sweep import sweep_thresholds
+from src.embedder import MatrixEmbedder, get_matrix_embedder
+from src.embedding_cache import CachedEmbedder
 
 
 def run_pipeline(
@@ -27,108 +44,338 @@ def run_pipeline(
     report_path: Path,
     gold_path: Path | None = None,
     master_path: Path | None = None,
+    sweep: list[float] | None = None,
     log: Callable[[str], None] = print,
+    embedder: MatrixEmbedder | None = None,
+) -> dict[str, Any]:
+    with collect(RunMetrics()) as run_metrics:
+        return _run_pipeline(
+            config=config,
+            data_path=data_path,
+            report_path=report_path,
+            gold_path=gold_path,
+            master_path=master_path,
+            sweep=sweep,
+            log=log,
+            embedder=embedder,
+            run_metrics=run_metrics,
+        )
+
+
+def _run_pipeline(
+    *,
+    config: Config,
+    data_path: Path,
+    report_path: Path,
+    gold_path: Path | None,
+    master_path: Path | None,
+    sweep: list[float] | None,
+    log: Callable[[str], None],
+    embedder: MatrixEmbedder | None,
+    run_metrics: RunMetrics,
 ) -> dict[str, Any]:
     start_time = time.perf_counter()
 
-    def log_step(message: str) -> None:
+    def log_step(message: str, stage: str | None = None) -> None:
+        if stage is not None:
+            run_metrics.start_stage(stage)
         elapsed = time.perf_counter() - start_time
         log(f"[{elapsed:6.2f}s] {message}")
 
-    log_step("Running health checks")
+    log_step("Running health checks", stage="health")
     paths = [data_path]
     if master_path is not None:
         paths.append(master_path)
     ensure_data_files(paths)
-    provider = check_embedding_provider(config)
-    check_qdrant(config.qdrant_url)
+    provider = run_health_checks(config, embedding=embedder is None)
+    backend = get_search_backend(config)
+    check_export_formats(config.export_formats)
+    if config.blocking not in BLOCKING_MODES:
+        raise ValueError(f"BLOCKING must be one of: {', '.join(BLOCKING_MODES)}.")
+    if config.blocking == "replace" and (config.incremental or config.stream_chunk_size > 0):
+        raise ValueError("BLOCKING=replace needs all vectors in memory; use restrict instead.")
     log_step(f"Health checks passed (provider: {provider})")
 
-    log_step("Loading data")
-    companies = load_companies(data_path)
-    log(f"Loaded {len(companies)} companies from {data_path}.")
-    for row in companies[:5]:
-        normalized = normalize_name(row["company_name"])
-        log(f"  id={row['id']} raw='{row['company_name']}' normalized='{normalized}'")
+    provider_embedder = embedder if embedder is not None else get_matrix_embedder()
+    embedder = metered_embedder(provider_embedder)
+    collapser = DuplicateCollapser(config.dedupe_key)
+    plan: IncrementalPlan | None = None
+    id_to_vector: dict[int | str, np.ndarray] = {}
+    if config.stream_chunk_size > 0:
+        if config.incremental:
+            raise ValueError("Incremental mode cannot be combined with streaming input.")
+        log_step(f"Streaming data in chunks of {config.stream_chunk_size}", stage="stream")
+        companies, unique_rows = _stream_into_index(
+            config, backend, embedder, collapser, data_path, log=log
+        )
+        log(
+            f"Embedded and upserted {len(unique_rows)} of {len(companies)} companies "
+            f"from {data_path}."
+        )
+        indexed = len(unique_rows) > 0
+    else:
+        log_step("Loading data", stage="load")
+        companies = load_records(data_path)
+        log(f"Loaded {len(companies)} companies from {data_path}.")
+        for row in companies[:5].iter_rows():
+            normalized = normalize_name(row["company_name"])
+            log(f"  id={row['id']} raw='{row['company_name']}' normalized='{normalized}'")
 
-    log_step("Generating embeddings")
-    embedder = get_embedder()
-    names = [row["company_name"] for row in companies]
-    vectors = embedder(names)
+        unique_rows = collapser.collapse(companies)
+        if len(unique_rows) < len(companies):
+            log(
+                f"Collapsed {len(companies) - len(unique_rows)} duplicate rows "
+                f"({config.dedupe_key} key); indexing {len(unique_rows)}."
+            )
+
+        embed_rows = unique_rows
+        if config.incremental:
+            log_step("Diffing against existing collection", stage="diff")
+            existing = backend.point_payloads(
+                config.collection_name, ["content_hash", "neighbors", "neighbors_top_k"]
+            )
+            plan = plan_incremental(unique_rows, existing, config.top_k)
+            embed_rows = RecordBatch.from_rows(plan.changed)
+            log(
+                f"Incremental: {len(plan.changed)} new or changed, "
+                f"{len(plan.deleted)} deleted, "
+                f"{len(unique_rows) - len(plan.changed)} unchanged."
+            )
+
+        log_step("Generating embeddings", stage="embed")
+        vectors = embedder(embed_rows.names.tolist())
+
+        if len(vectors):
+            log(f"Generated {len(vectors)} embeddings with dimension {vectors.shape[1]}.")
+            created = False
+            if config.blocking != "replace":
+                log_step(f"Upserting vectors into {backend.label}", stage="upsert")
+                created = backend.ensure_collection(config.collection_name, vectors.shape[1])
+            if created and plan is not None and len(embed_rows) < len(unique_rows):
+                log("Collection was recreated; re-embedding all rows.")
+                plan = plan_incremental(unique_rows, {}, config.top_k)
+                embed_rows = unique_rows
+                vectors = embedder(unique_rows.names.tolist())
+            embed_rows = embed_rows.with_vectors(vectors)
+            id_to_vector = embed_rows.id_to_vector()
+            if plan is None:
+                unique_rows = embed_rows
+            if config.blocking != "replace":
+                backend.upsert_vectors(config.collection_name, embed_rows, vectors)
+                log(f"Upserted {len(vectors)} vectors into '{config.collection_name}'.")
+        if plan is not None and plan.deleted:
+            backend.delete_points(config.collection_name, plan.deleted)
+            log(f"Deleted {len(plan.deleted)} stale points from '{config.collection_name}'.")
+
+        indexed = len(vectors) > 0 or (plan is not None and len(unique_rows) > 0)
+
+    increment("rows_loaded", len(companies))
+    increment("rows_indexed", len(unique_rows))
+    if isinstance(provider_embedder, CachedEmbedder):
+        log(
+            f"Embedding cache: {provider_embedder.hits} hits, "
+            f"{provider_embedder.misses} misses."
+        )
 
     pairs: list[tuple[int | str, int | str, float]] = []
     mapping: dict[int | str, dict[str, object]] = {}
-
-    master_collection = None
-    id_to_vector = {}
-    if vectors:
-        log(f"Generated {len(vectors)} embeddings with dimension {len(vectors[0])}.")
-        id_to_vector = {row["id"]: vector for row, vector in zip(companies, vectors)}
-        log_step("Upserting vectors into Qdrant")
-        ensure_collection(config.collection_name, len(vectors[0]))
-        upsert_vectors(config.collection_name, companies, vectors)
-        log(f"Upserted {len(vectors)} vectors into '{config.collection_name}'.")
+    master_lookup: MasterLookup | None = None
 
     if master_path is not None:
-        log_step("Loading master list")
-        master_rows = load_companies(master_path)
-        log(f"Loaded {len(master_rows)} master rows from {master_path}.")
-        master_names = [row["company_name"] for row in master_rows]
-        log_step("Embedding master list")
-        master_vectors = embedder(master_names)
-        if master_vectors:
-            master_collection = f"{config.collection_name}_master"
-            ensure_collection(master_collection, len(master_vectors[0]))
-            upsert_vectors(master_collection, master_rows, master_vectors)
+        log_step("Loading master index", stage="master")
+        master_lookup = load_master_index(
+            config=config,
+            backend=backend,
+            master_path=master_path,
+            embed=embedder,
+            log=log,
+        )
+
+    if indexed and config.blocking == "replace":
+        log_step("Generating candidates with MinHash/LSH blocking", stage="blocking")
+        pairs = blocked_pairs(
+            unique_rows,
+            bands=config.blocking_bands,
+            rows_per_band=config.blocking_rows,
+            ngram=config.blocking_ngram,
+        )
+        log(f"Blocking produced {len(pairs)} candidate pairs.")
+    elif indexed:
+        log_step("Searching nearest neighbors", stage="search")
+        id_to_name = companies.id_to_name()
+        if plan is None:
+            # Streaming runs keep no vectors around, so the backend queries by id.
+            neighbor_results = backend.nearest(
+                config.collection_name,
+                config.top_k,
+                id_to_vector=id_to_vector or None,
+                id_to_name=id_to_name,
+            )
+        else:
+            neighbor_results = backend.nearest(
+                config.collection_name,
+                config.top_k,
+                id_to_vector=id_to_vector,
+                id_to_name=id_to_name,
+                ids=plan.requery,
+            )
+            reverse_results = []
+            if plan.changed and plan.stored_neighbors:
+                reverse_results = backend.nearest_within(
+                    config.collection_name,
+                    config.top_k,
+                    ids=list(plan.stored_neighbors),
+                    within=[row["id"] for row in plan.changed],
+                )
+            backend.set_payloads(
+                config.collection_name,
+                {
+                    **neighbor_payloads(neighbor_results, plan.affected, config.top_k),
+                    **merge_reverse_neighbors(plan, reverse_results, config.top_k),
+                },
+            )
             log(
-                f"Upserted {len(master_vectors)} master vectors into '{master_collection}'."
+                f"Searched {len(plan.affected)} affected points; reused stored "
+                f"neighbors for {len(plan.stored_neighbors)}."
             )
-
-    if vectors:
-        log_step("Searching nearest neighbors")
-        neighbor_results = nearest(config.collection_name, config.top_k)
+            neighbor_results.extend(stored_neighbor_records(plan, id_to_name))
         log(f"Retrieved {len(neighbor_results)} neighbor records.")
         pairs = build_pairs(neighbor_results)
         log(f"Built {len(pairs)} candidate pairs.")
+        if config.blocking == "restrict":
+            pairs = restrict_pairs(
+                pairs,
+                unique_rows,
+                bands=config.blocking_bands,
+                rows_per_band=config.blocking_rows,
+                ngram=config.blocking_ngram,
+            )
+            log(f"Blocking kept {len(pairs)} candidate pairs.")
 
+    if indexed:
         top_pairs = sorted(pairs, key=lambda item: item[2], reverse=True)[:5]
         for id1, id2, score in top_pairs:
             log(f"  pair {id1} <-> {id2} score={score:.4f}")
 
-        log_step("Clustering candidates")
+        log_step("Clustering candidates", stage="cluster")
         clusters = cluster_candidates(pairs, config.sim_threshold)
-        mapping = dedupe_mapping(companies, clusters)
-        if master_collection is not None and id_to_vector:
+        mapping = dedupe_mapping(companies, clusters, collapser.groups)
+        if master_lookup is not None:
             _apply_master_canonicals(
-                mapping, master_collection, id_to_vector, log=log
+                mapping,
+                master_lookup,
+                id_to_vector,
+                embed=embedder,
+                log=log,
             )
         cluster_sizes = {}
         for entry in mapping.values():
             cluster_sizes[entry["cluster_id"]] = len(entry.get("members", []))
         non_trivial_count = sum(1 for size in cluster_sizes.values() if size > 1)
         log(f"Identified {len(cluster_sizes)} clusters; {non_trivial_count} non-trivial.")
+        increment("pairs", len(pairs))
+        increment("clusters", len(cluster_sizes))
+        increment("clusters_non_trivial", non_trivial_count)
 
-    log_step("Evaluating against gold (if available)")
+    log_step("Evaluating against gold (if available)", stage="evaluate")
     metrics = evaluate_if_available(gold_path, mapping)
 
-    log_step("Writing report")
-    write_report(report_path, config, companies, pairs, mapping, metrics)
-    log("report.html written.")
+    sweep_result = None
+    if sweep:
+        log_step("Sweeping similarity thresholds", stage="sweep")
+        gold_labels = load_gold_labels(gold_path) if gold_path is not None else None
+        if gold_labels is None:
+            log("Threshold sweep skipped: no gold file found.")
+        else:
+            sweep_result = sweep_thresholds(
+                companies.id_list(), pairs, sweep, gold_labels, collapser.groups
+            )
+            for point in sweep_result["points"]:
+                log(
+                    f"  threshold={point['threshold']:.3f} "
+                    f"precision={point['precision']:.3f} "
+                    f"recall={point['recall']:.3f} f1={point['f1']:.3f}"
+                )
+            log(f"Recommended threshold: {sweep_result['recommended_threshold']:.3f}")
+
+    exports: list[Path] = []
+    if config.export_formats:
+        log_step(f"Exporting {', '.join(config.export_formats)}", stage="export")
+        exports = write_exports(
+            Path(config.export_dir) if config.export_dir else report_path.parent,
+            report_path.name.split(".")[0],
+            config.export_formats,
+            companies,
+            pairs,
+            mapping,
+        )
+        log(f"Wrote {len(exports)} export files.")
+
+    log_step("Writing report", stage="report")
+    report_path = write_report(
+        report_path,
+        config,
+        companies,
+        pairs,
+        mapping,
+        metrics,
+        sweep=sweep_result,
+        exports=exports,
+    )
+    log(f"{report_path.name} written.")
+    run_metrics.finish()
+    run_summary = write_run_summary(report_path, run_metrics)
+    log(f"{run_summary.name} written.")
 
     return {
-        "companies": companies,
+        "companies": companies.to_rows(),
+        "records": companies,
         "pairs": pairs,
         "mapping": mapping,
         "metrics": metrics,
+        "sweep": sweep_result,
         "report_path": report_path,
+        "exports": exports,
+        "run_summary": run_summary,
     }
 
 
+def _stream_into_index(
+    config: Config,
+    backend: SearchBackend,
+    embedder: MatrixEmbedder,
+    collapser: DuplicateCollapser,
+    data_path: Path,
+    *,
+    log: Callable[[str], None],
+) -> tuple[RecordBatch, RecordBatch]:
+    batches: list[RecordBatch] = []
+    indexed: list[RecordBatch] = []
+    upserted = 0
+    collection_ready = False
+    for chunk in iter_companies(data_path, config.stream_chunk_size):
+        batch = RecordBatch.from_rows(chunk)
+        batches.append(batch)
+        batch = collapser.collapse(batch)
+        vectors = embedder(batch.names.tolist())
+        if not len(vectors):
+            continue
+        if not collection_ready:
+            backend.ensure_collection(config.collection_name, vectors.shape[1])
+            collection_ready = True
+        backend.upsert_vectors(config.collection_name, batch, vectors)
+        indexed.append(batch)
+        upserted += len(batch)
+        log(f"  upserted {upserted} rows into '{config.collection_name}'")
+    return RecordBatch.concat(batches), RecordBatch.concat(indexed)
+
+
 def _apply_master_canonicals(
     mapping: dict[int | str, dict[str, object]],
-    master_collection: str,
-    id_to_vector: dict[int | str, list[float]],
+    master_lookup: MasterLookup,
+    id_to_vector: dict[int | str, np.ndarray],
     *,
+    embed: MatrixEmbedder,
     log: Callable[[str], None],
 ) -> None:
     cluster_entries: dict[str, dict[str, object]] = {}
@@ -138,25 +385,40 @@ def _apply_master_canonicals(
             continue
         cluster_entries.setdefault(str(cluster_id), entry)
 
+    representatives: dict[str, tuple[list[dict[str, object]], dict[str, object]]] = {}
     for cluster_id, entry in cluster_entries.items():
         members = entry.get("members", [])
         if not isinstance(members, list) or not members:
             continue
-        representative = _choose_representative(members)
-        vector = id_to_vector.get(representative["id"])
-        if vector is None:
-            continue
-        matches = query_top_by_vector(master_collection, vector, top_k=1)
-        if not matches:
-            continue
-        payload = matches[0].payload or {}
-        master_name = payload.get("company_name")
+        representatives[cluster_id] = (members, _choose_representative(members))
+
+    missing = {
+        representative["id"]: str(representative["company_name"])
+        for _, representative in representatives.values()
+        if representative["id"] not in id_to_vector
+    }
+    if missing:
+        id_to_vector = {
+            **id_to_vector,
+            **dict(zip(missing, embed(list(missing.values())), strict=True)),
+        }
+
+    resolvable = [
+        (members, id_to_vector[representative["id"]])
+        for members, representative in representatives.values()
+        if representative["id"] in id_to_vector
+    ]
+    if not resolvable:
+        return
+    master_names = master_lookup(np.stack([vector for _, vector in resolvable]))
+    renamed = 0
+    for (members, _), master_name in zip(resolvable, master_names, strict=True):
         if not master_name:
             continue
         for member in members:
-            member_id = member["id"]
-            mapping[member_id]["canonical_name"] = master_name
-        log(f"Cluster {cluster_id} canonical set to master: {master_name}")
+            mapping[member["id"]]["canonical_name"] = master_name
+        renamed += 1
+    log(f"Set canonical names from the master list for {renamed} clusters.")
 
 
 def _choose_representative(members: list[dict[str, object]]) -> dict[str, object]:
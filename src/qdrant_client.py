@@ -1,19 +1,61 @@
 from __future__ import annotations
 
-from typing import Any
+import atexit
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from itertools import chain
+from typing import Any, Iterable, Iterator
 
+import httpx
+import numpy as np
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 
-from src.config import Config
+from src.config import LOCAL_QDRANT_URL, get_config
+from src.incremental import content_hash
+from src.metrics import timed
+from src.records import RecordBatch, iter_rows
+
+
+_CLIENTS: dict[tuple[str, bool, int], QdrantClient] = {}
+_CLIENTS_LOCK = threading.Lock()
 
 
 def client() -> QdrantClient:
-    config = Config.from_env()
-    return QdrantClient(url=config.qdrant_url)
+    config = get_config()
+    key = (config.qdrant_url, config.qdrant_prefer_grpc, config.qdrant_grpc_port)
+    with _CLIENTS_LOCK:
+        qdrant = _CLIENTS.get(key)
+        if qdrant is None and config.qdrant_url == LOCAL_QDRANT_URL:
+            qdrant = QdrantClient(location=LOCAL_QDRANT_URL)
+            _CLIENTS[key] = qdrant
+        elif qdrant is None:
+            pool_size = max(1, config.qdrant_pool_size)
+            qdrant = QdrantClient(
+                url=config.qdrant_url,
+                prefer_grpc=config.qdrant_prefer_grpc,
+                grpc_port=config.qdrant_grpc_port,
+                limits=httpx.Limits(
+                    max_connections=pool_size, max_keepalive_connections=pool_size
+                ),
+            )
+            _CLIENTS[key] = qdrant
+    return qdrant
+
+
+def close_clients() -> None:
+    with _CLIENTS_LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for qdrant in clients:
+        qdrant.close()
+
 
+atexit.register(close_clients)
 
-def ensure_collection(name: str, dim: int) -> None:
+
+def ensure_collection(name: str, dim: int) -> bool:
     qdrant = client()
     if qdrant.collection_exists(name):
         info = qdrant.get_collection(name)
@@ -21,76 +63,395 @@ def ensure_collection(name: str, dim: int) -> None:
         if existing_dim is not None and existing_dim != dim:
             qdrant.delete_collection(name)
         else:
-            return
+            return False
     qdrant.create_collection(
         collection_name=name,
         vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE),
     )
+    return True
+
+
+def delete_collection(name: str) -> bool:
+    qdrant = client()
+    if not qdrant.collection_exists(name):
+        return False
+    qdrant.delete_collection(name)
+    return True
 
 
-def upsert_vectors(name: str, rows: list[dict[str, Any]], vectors: list[list[float]]) -> None:
+def collection_stats(name: str) -> tuple[int, int] | None:
+    qdrant = client()
+    if not qdrant.collection_exists(name):
+        return None
+    info = qdrant.get_collection(name)
+    return info.points_count or 0, _extract_vector_size(info.config.params.vectors) or 0
+
+
+def upsert_vectors(
+    name: str,
+    rows: RecordBatch | list[dict[str, Any]],
+    vectors: np.ndarray | list[list[float]],
+    *,
+    batch_size: int = 256,
+    parallel: int = 1,
+) -> None:
     if len(rows) != len(vectors):
         raise ValueError("Rows and vectors length mismatch.")
-    points: list[models.PointStruct] = []
-    for row, vector in zip(rows, vectors, strict=True):
-        payload = {
-            "id": row["id"],
-            "company_name": row["company_name"],
-        }
-        points.append(models.PointStruct(id=row["id"], vector=vector, payload=payload))
     qdrant = client()
-    qdrant.upsert(collection_name=name, points=points)
+    points = (
+        models.PointStruct(
+            id=row["id"],
+            vector=_as_list(vector),
+            payload={
+                "id": row["id"],
+                "company_name": row["company_name"],
+                "content_hash": content_hash(row["id"], row["company_name"]),
+            },
+        )
+        for row, vector in zip(iter_rows(rows), vectors, strict=True)
+    )
+    _upsert_batches(qdrant, name, _chunked(points, batch_size), max(1, parallel))
+
 
+def _upsert_batches(
+    qdrant: QdrantClient,
+    name: str,
+    batches: Iterator[list[models.PointStruct]],
+    parallel: int,
+) -> None:
+    pending = next(batches, None)
+    if pending is None:
+        return
+    in_flight: set[Future[Any]] = set()
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        for batch in batches:
+            if len(in_flight) >= parallel:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            in_flight.add(pool.submit(copy_context().run, _upsert, qdrant, name, pending, False))
+            pending = batch
+        for future in in_flight:
+            future.result()
+    # Updates are applied in order, so a waited final batch acts as a barrier
+    # for every unwaited batch before it.
+    _upsert(qdrant, name, pending, True)
 
-def nearest(name: str, top_k: int) -> list[dict[str, Any]]:
+
+def _upsert(
+    qdrant: QdrantClient, name: str, points: list[models.PointStruct], wait: bool
+) -> None:
+    with timed("qdrant_request", op="upsert"):
+        qdrant.upsert(collection_name=name, points=points, wait=wait)
+
+
+def nearest(
+    name: str,
+    top_k: int,
+    *,
+    id_to_vector: dict[Any, np.ndarray | list[float]] | None = None,
+    id_to_name: dict[Any, str] | None = None,
+    ids: list[Any] | None = None,
+    batch_size: int = 256,
+) -> list[dict[str, Any]]:
     qdrant = client()
     results: list[dict[str, Any]] = []
-    scroll_result = qdrant.scroll(
-        collection_name=name,
-        with_payload=True,
-        with_vectors=True,
-        limit=10_000,
-    )
-    points = scroll_result[0]
-    for point in points:
-        if point.vector is None:
+    if id_to_vector is not None or ids is not None:
+        names = id_to_name or {}
+        by_vector = (
+            (point_id, names.get(point_id), vector)
+            for point_id, vector in (id_to_vector or {}).items()
+        )
+        by_id = ((point_id, names.get(point_id), point_id) for point_id in ids or [])
+        chunks = _chunked(chain(by_vector, by_id), batch_size)
+    else:
+        chunks = _scroll_id_queries(qdrant, name, batch_size)
+    for chunk in chunks:
+        requests = [
+            models.QueryRequest(query=_as_list(query), limit=top_k + 1, with_payload=True)
+            for _, _, query in chunk
+        ]
+        with timed("qdrant_request", op="query_batch_points"):
+            responses = qdrant.query_batch_points(collection_name=name, requests=requests)
+        for (point_id, company_name, _), response in zip(chunk, responses, strict=True):
+            results.extend(
+                _neighbor_records(point_id, company_name, response.points, top_k)
+            )
+    return results
+
+
+def nearest_within(
+    name: str,
+    top_k: int,
+    *,
+    ids: list[Any],
+    within: list[Any],
+    batch_size: int = 256,
+) -> list[dict[str, Any]]:
+    qdrant = client()
+    restrict = models.Filter(must=[models.HasIdCondition(has_id=list(within))])
+    results: list[dict[str, Any]] = []
+    for chunk in _chunked(ids, batch_size):
+        requests = [
+            models.QueryRequest(query=point_id, filter=restrict, limit=top_k, with_payload=True)
+            for point_id in chunk
+        ]
+        with timed("qdrant_request", op="query_batch_points"):
+            responses = qdrant.query_batch_points(collection_name=name, requests=requests)
+        for point_id, response in zip(chunk, responses, strict=True):
+            results.extend(_neighbor_records(point_id, None, response.points, top_k))
+    return results
+
+
+def _scroll_id_queries(
+    qdrant: QdrantClient, name: str, batch_size: int
+) -> Iterator[list[tuple[Any, str | None, Any]]]:
+    offset = None
+    while True:
+        with timed("qdrant_request", op="scroll"):
+            points, offset = qdrant.scroll(
+                collection_name=name,
+                with_payload=["company_name"],
+                with_vectors=False,
+                limit=batch_size,
+                offset=offset,
+            )
+        chunk = [
+            (point.id, point.payload.get("company_name") if point.payload else None, point.id)
+            for point in points
+        ]
+        if chunk:
+            yield chunk
+        if offset is None:
+            return
+
+
+def _neighbor_records(
+    point_id: Any,
+    company_name: str | None,
+    neighbors: list[models.ScoredPoint],
+    top_k: int,
+) -> list[dict[str, Any]]:
+    records: list[dict[str, Any]] = []
+    for neighbor in neighbors:
+        if neighbor.id == point_id:
             continue
+        records.append(
+            {
+                "id": point_id,
+                "company_name": company_name,
+                "neighbor_id": neighbor.id,
+                "neighbor_name": neighbor.payload.get("company_name") if neighbor.payload else None,
+                "score": neighbor.score,
+            }
+        )
+        if len(records) >= top_k:
+            break
+    return records
+
+
+def _as_list(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value
+
+
+def _chunked(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    chunk: list[Any] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def point_payloads(
+    name: str, fields: list[str], batch_size: int = 1_024
+) -> dict[Any, dict[str, Any]]:
+    qdrant = client()
+    if not qdrant.collection_exists(name):
+        return {}
+    payloads: dict[Any, dict[str, Any]] = {}
+    offset = None
+    while True:
+        with timed("qdrant_request", op="scroll"):
+            points, offset = qdrant.scroll(
+                collection_name=name,
+                with_payload=fields,
+                with_vectors=False,
+                limit=batch_size,
+                offset=offset,
+            )
+        for point in points:
+            payloads[point.id] = point.payload or {}
+        if offset is None:
+            return payloads
+
+
+def delete_points(name: str, ids: list[Any], batch_size: int = 1_024) -> None:
+    qdrant = client()
+    for chunk in _chunked(ids, batch_size):
+        with timed("qdrant_request", op="delete"):
+            qdrant.delete(
+                collection_name=name,
+                points_selector=models.PointIdsList(points=chunk),
+                wait=True,
+            )
+
+
+def set_payloads(
+    name: str, payloads: dict[Any, dict[str, Any]], batch_size: int = 256
+) -> None:
+    qdrant = client()
+    for chunk in _chunked(payloads.items(), batch_size):
+        with timed("qdrant_request", op="batch_update_points"):
+            qdrant.batch_update_points(
+                collection_name=name,
+                update_operations=[
+                    models.SetPayloadOperation(
+                        set_payload=models.SetPayload(payload=payload, points=[point_id])
+                    )
+                    for point_id, payload in chunk
+                ],
+                wait=True,
+            )
+
+
+def query_top_by_vector(
+    name: str, vector: np.ndarray | list[float], top_k: int = 1
+) -> list[models.ScoredPoint]:
+    qdrant = client()
+    with timed("qdrant_request", op="query_points"):
         response = qdrant.query_points(
             collection_name=name,
-            query=point.vector,
-            limit=top_k + 1,
+            query=_as_list(vector),
+            limit=top_k,
             with_payload=True,
         )
-        added = 0
-        for neighbor in response.points:
-            if neighbor.id == point.id:
-                continue
-            results.append(
+    return list(response.points)
+
+
+def query_top_by_vectors(
+    name: str, vectors: np.ndarray, top_k: int = 1, batch_size: int = 256
+) -> list[list[models.ScoredPoint]]:
+    qdrant = client()
+    results: list[list[models.ScoredPoint]] = []
+    for chunk in _chunked(vectors, batch_size):
+        requests = [
+            models.QueryRequest(query=_as_list(vector), limit=top_k, with_payload=True)
+            for vector in chunk
+        ]
+        with timed("qdrant_request", op="query_batch_points"):
+            responses = qdrant.query_batch_points(collection_name=name, requests=requests)
+        results.extend(list(response.points) for response in responses)
+    return results
+
+
+def count_points(name: str) -> int | None:
+    qdrant = client()
+    if not qdrant.collection_exists(name):
+        return None
+    with timed("qdrant_request", op="count"):
+        return qdrant.count(collection_name=name, exact=True).count
+
+
+class QdrantSearchBackend:
+    label = "Qdrant"
+
+    def __init__(
+        self,
+        batch_size: int = 256,
+        upsert_batch_size: int = 256,
+        upsert_parallel: int = 1,
+    ) -> None:
+        self._batch_size = batch_size
+        self._upsert_batch_size = upsert_batch_size
+        self._upsert_parallel = upsert_parallel
+
+    def ensure_collection(self, name: str, dim: int) -> bool:
+        return ensure_collection(name, dim)
+
+    def upsert_vectors(
+        self,
+        name: str,
+        rows: RecordBatch | list[dict[str, Any]],
+        vectors: np.ndarray | list[list[float]],
+    ) -> None:
+        upsert_vectors(
+            name,
+            rows,
+            vectors,
+            batch_size=self._upsert_batch_size,
+            parallel=self._upsert_parallel,
+        )
+
+    def nearest(
+        self,
+        name: str,
+        top_k: int,
+        *,
+        id_to_vector: dict[Any, np.ndarray | list[float]] | None = None,
+        id_to_name: dict[Any, str] | None = None,
+        ids: list[Any] | None = None,
+    ) -> list[dict[str, Any]]:
+        return nearest(
+            name,
+            top_k,
+            id_to_vector=id_to_vector,
+            id_to_name=id_to_name,
+            ids=ids,
+            batch_size=self._batch_size,
+        )
+
+    def nearest_within(
+        self, name: str, top_k: int, *, ids: list[Any], within: list[Any]
+    ) -> list[dict[str, Any]]:
+        return nearest_within(
+            name, top_k, ids=ids, within=within, batch_size=self._batch_size
+        )
+
+    def query_top_by_vector(
+        self, name: str, vector: np.ndarray | list[float], top_k: int = 1
+    ) -> list[dict[str, Any]]:
+        return [
+            {
+                "id": point.id,
+                "company_name": point.payload.get("company_name") if point.payload else None,
+                "score": point.score,
+            }
+            for point in query_top_by_vector(name, vector, top_k=top_k)
+        ]
+
+    def query_top_by_vectors(
+        self, name: str, vectors: np.ndarray, top_k: int = 1
+    ) -> list[list[dict[str, Any]]]:
+        return [
+            [
                 {
                     "id": point.id,
                     "company_name": point.payload.get("company_name") if point.payload else None,
-                    "neighbor_id": neighbor.id,
-                    "neighbor_name": neighbor.payload.get("company_name") if neighbor.payload else None,
-                    "score": neighbor.score,
+                    "score": point.score,
                 }
+                for point in points
+            ]
+            for points in query_top_by_vectors(
+                name, vectors, top_k=top_k, batch_size=self._batch_size
             )
-            added += 1
-            if added >= top_k:
-                break
-    return results
+        ]
 
+    def count_points(self, name: str) -> int | None:
+        return count_points(name)
 
-def query_top_by_vector(
-    name: str, vector: list[float], top_k: int = 1
-) -> list[models.ScoredPoint]:
-    qdrant = client()
-    response = qdrant.query_points(
-        collection_name=name,
-        query=vector,
-        limit=top_k,
-        with_payload=True,
-    )
-    return list(response.points)
+    def point_payloads(self, name: str, fields: list[str]) -> dict[Any, dict[str, Any]]:
+        return point_payloads(name, fields)
+
+    def delete_points(self, name: str, ids: list[Any]) -> None:
+        delete_points(name, ids)
+
+    def set_payloads(self, name: str, payloads: dict[Any, dict[str, Any]]) -> None:
+        set_payloads(name, payloads, batch_size=self._batch_size)
 
 
 def _extract_vector_size(vectors: Any) -> int | None:
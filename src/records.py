@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, Sequence
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class RecordBatch:
+    ids: np.ndarray
+    names: np.ndarray
+    vectors: np.ndarray | None = None
+
+    @classmethod
+    def from_rows(
+        cls, rows: Iterable[dict[str, Any]], vectors: Any = None
+    ) -> RecordBatch:
+        materialized = rows if isinstance(rows, Sequence) else list(rows)
+        ids = [row["id"] for row in materialized]
+        names = [row["company_name"] for row in materialized]
+        return cls.from_columns(ids, names, vectors)
+
+    @classmethod
+    def from_columns(
+        cls, ids: list[Any], names: list[str], vectors: Any = None
+    ) -> RecordBatch:
+        if len(ids) != len(names):
+            raise ValueError("Ids and names length mismatch.")
+        return cls(_id_array(ids), _object_array(names), as_matrix(vectors))
+
+    @classmethod
+    def concat(cls, batches: Sequence[RecordBatch]) -> RecordBatch:
+        if not batches:
+            return cls.from_rows([])
+        ids = [point_id for batch in batches for point_id in batch.ids.tolist()]
+        names = np.concatenate([batch.names for batch in batches])
+        vectors = None
+        if all(batch.vectors is not None for batch in batches):
+            vectors = np.concatenate([batch.vectors for batch in batches])
+        return cls(_id_array(ids), names, vectors)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, key: slice) -> RecordBatch:
+        vectors = self.vectors[key] if self.vectors is not None else None
+        return RecordBatch(self.ids[key], self.names[key], vectors)
+
+    def take(self, indices: Sequence[int]) -> RecordBatch:
+        positions = np.asarray(indices, dtype=np.int64)
+        vectors = self.vectors[positions] if self.vectors is not None else None
+        return RecordBatch(self.ids[positions], self.names[positions], vectors)
+
+    def with_vectors(self, vectors: Any) -> RecordBatch:
+        matrix = as_matrix(vectors)
+        if matrix is not None and matrix.shape[0] != len(self):
+            raise ValueError("Rows and vectors length mismatch.")
+        return RecordBatch(self.ids, self.names, matrix)
+
+    def id_list(self) -> list[Any]:
+        return self.ids.tolist()
+
+    def id_to_name(self) -> dict[Any, str]:
+        return dict(zip(self.ids.tolist(), self.names.tolist(), strict=True))
+
+    def id_to_vector(self) -> dict[Any, np.ndarray]:
+        if self.vectors is None:
+            return {}
+        return dict(zip(self.ids.tolist(), self.vectors, strict=True))
+
+    def iter_rows(self) -> Iterator[dict[str, Any]]:
+        for point_id, name in zip(self.ids.tolist(), self.names.tolist(), strict=True):
+            yield {"id": point_id, "company_name": name}
+
+    def to_rows(self) -> list[dict[str, Any]]:
+        return list(self.iter_rows())
+
+
+def as_record_batch(rows: RecordBatch | Iterable[dict[str, Any]]) -> RecordBatch:
+    if isinstance(rows, RecordBatch):
+        return rows
+    return RecordBatch.from_rows(rows)
+
+
+def iter_rows(rows: RecordBatch | Iterable[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+    if isinstance(rows, RecordBatch):
+        return rows.iter_rows()
+    return iter(rows)
+
+
+def names_by_id(rows: RecordBatch | Iterable[dict[str, Any]]) -> dict[Any, str]:
+    if isinstance(rows, RecordBatch):
+        return rows.id_to_name()
+    return {row["id"]: row["company_name"] for row in rows}
+
+
+def as_matrix(vectors: Any) -> np.ndarray | None:
+    if vectors is None:
+        return None
+    matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1 and matrix.size == 0:
+        return matrix.reshape(0, 0)
+    if matrix.ndim != 2:
+        raise ValueError("Embedding vectors must form a 2-D matrix.")
+    return matrix
+
+
+def _id_array(ids: list[Any]) -> np.ndarray:
+    if ids and all(type(point_id) is int for point_id in ids):
+        try:
+            return np.asarray(ids, dtype=np.int64)
+        except OverflowError:
+            pass
+    return _object_array(ids)
+
+
+def _object_array(values: list[Any]) -> np.ndarray:
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
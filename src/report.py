@@ -1,48 +1,128 @@
 from __future__ import annotations
 
+import csv
+import gzip
+import heapq
+import os
+import re
 from html import escape
 from pathlib import Path
-from typing import Any
+from typing import Any, TextIO
 
 from src.config import Config
+from src.records import RecordBatch, names_by_id
+
+
+_WRITE_BUFFER = 1024 * 1024
+_NEEDS_ESCAPE = re.compile(r"[&<>\"']")
 
 
 def write_report(
     path: Path,
     config: Config,
-    companies: list[dict[str, Any]],
+    companies: RecordBatch | list[dict[str, Any]],
     pairs: list[tuple[Any, Any, float]],
     mapping: dict[Any, dict[str, Any]],
     metrics: dict[str, float] | None = None,
-) -> None:
-    id_to_name = {row["id"]: row["company_name"] for row in companies}
-    top_pairs = sorted(pairs, key=lambda item: item[2], reverse=True)[:25]
+    *,
+    sweep: dict[str, Any] | None = None,
+    exports: list[Path] | None = None,
+) -> Path:
+    id_to_name = names_by_id(companies)
+    top_pairs = heapq.nlargest(25, pairs, key=lambda item: item[2])
+    cluster_rows = _cluster_rows(mapping)
+    deduped_count = len(cluster_rows) if cluster_rows else len(companies)
+
+    if config.report_gzip and path.suffix != ".gz":
+        path = path.with_name(f"{path.name}.gz")
+    inline_rows = cluster_rows
+    members_path = None
+    if 0 < config.report_max_clusters < len(cluster_rows):
+        inline_rows = cluster_rows[: config.report_max_clusters]
+        members_path = _members_path(path)
+        _write_members_csv(members_path, cluster_rows)
+
+    with _open_text(path) as out:
+        _write_report_body(
+            out,
+            config,
+            len(companies),
+            deduped_count,
+            id_to_name,
+            top_pairs,
+            inline_rows,
+            len(cluster_rows),
+            members_path,
+            [Path(os.path.relpath(export, path.parent)) for export in exports or []],
+            metrics,
+            sweep,
+        )
+    return path
 
+
+def _cluster_rows(mapping: dict[Any, dict[str, Any]]) -> list[dict[str, Any]]:
     cluster_map: dict[str, dict[str, Any]] = {}
     for entry in mapping.values():
         cluster_id = entry["cluster_id"]
-        cluster = cluster_map.setdefault(
-            cluster_id,
-            {"canonical": entry["canonical_name"], "members": {}},
-        )
-        for member in entry.get("members", []):
-            cluster["members"][member["id"]] = member["company_name"]
-
-    cluster_rows = []
-    for cluster_id in sorted(cluster_map.keys()):
-        cluster = cluster_map[cluster_id]
-        members = sorted(cluster["members"].items(), key=lambda item: str(item[0]))
-        cluster_rows.append(
-            {
-                "cluster_id": cluster_id,
-                "canonical": cluster["canonical"],
-                "members": members,
-            }
-        )
+        if cluster_id in cluster_map:
+            continue
+        members = [
+            (member["id"], member["company_name"]) for member in entry.get("members", [])
+        ]
+        if len(members) > 1:
+            members = sorted(dict(members).items(), key=lambda item: str(item[0]))
+        cluster_map[cluster_id] = {
+            "cluster_id": cluster_id,
+            "canonical": entry["canonical_name"],
+            "members": members,
+        }
+    return [cluster_map[cluster_id] for cluster_id in sorted(cluster_map)]
+
+
+def _escape(text: str) -> str:
+    if _NEEDS_ESCAPE.search(text) is None:
+        return text
+    return escape(text)
 
-    deduped_count = len(cluster_rows) if cluster_rows else len(companies)
 
-    html = f"""<!doctype html>
+def _open_text(path: Path) -> TextIO:
+    if path.suffix == ".gz":
+        return gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+    return open(path, "w", encoding="utf-8", buffering=_WRITE_BUFFER)
+
+
+def _members_path(report_path: Path) -> Path:
+    name = report_path.name.removesuffix(".gz").removesuffix(".html")
+    suffix = ".csv.gz" if report_path.suffix == ".gz" else ".csv"
+    return report_path.with_name(f"{name}_members{suffix}")
+
+
+def _write_members_csv(path: Path, cluster_rows: list[dict[str, Any]]) -> None:
+    with _open_text(path) as out:
+        writer = csv.writer(out)
+        writer.writerow(["cluster_id", "canonical_name", "id", "company_name"])
+        for cluster in cluster_rows:
+            writer.writerows(
+                (cluster["cluster_id"], cluster["canonical"], member_id, member_name)
+                for member_id, member_name in cluster["members"]
+            )
+
+
+def _write_report_body(
+    out: TextIO,
+    config: Config,
+    raw_count: int,
+    deduped_count: int,
+    id_to_name: dict[Any, str],
+    top_pairs: list[tuple[Any, Any, float]],
+    cluster_rows: list[dict[str, Any]],
+    total_clusters: int,
+    members_path: Path | None,
+    exports: list[Path],
+    metrics: dict[str, float] | None,
+    sweep: dict[str, Any] | None,
+) -> None:
+    out.write(f"""<!doctype html>
 <html lang=\"en\">
 <head>
   <meta charset=\"utf-8\" />
@@ -63,13 +143,23 @@ def write_report(
 
   <h2>Summary</h2>
   <ul>
-    <li>Raw records: <strong>{len(companies)}</strong></li>
+    <li>Raw records: <strong>{raw_count}</strong></li>
     <li>Deduped clusters: <strong>{deduped_count}</strong></li>
     <li>Threshold: <code>{config.sim_threshold}</code></li>
     <li>Top-K: <code>{config.top_k}</code></li>
     <li>Model: <code>{escape(config.embed_model)}</code></li>
   </ul>
+""")
+
+    if exports:
+        out.write("\n  <h2>Downloads</h2>\n  <ul>\n")
+        out.writelines(
+            f"    <li><a href=\"{escape(export.as_posix())}\">{escape(export.name)}</a></li>\n"
+            for export in exports
+        )
+        out.write("  </ul>\n")
 
+    out.write("""
   <h2>Top matched pairs</h2>
   <table>
     <thead>
@@ -82,32 +172,37 @@ def write_report(
       </tr>
     </thead>
     <tbody>
-"""
+""")
 
     if top_pairs:
-        for id1, id2, score in top_pairs:
-            name1 = escape(str(id_to_name.get(id1, "")))
-            name2 = escape(str(id_to_name.get(id2, "")))
-            html += (
-                "      <tr>"
-                f"<td>{escape(str(id1))}</td>"
-                f"<td>{name1}</td>"
-                f"<td>{escape(str(id2))}</td>"
-                f"<td>{name2}</td>"
-                f"<td>{score:.4f}</td>"
-                "</tr>\n"
-            )
+        out.writelines(
+            "      <tr>"
+            f"<td>{escape(str(id1))}</td>"
+            f"<td>{escape(str(id_to_name.get(id1, '')))}</td>"
+            f"<td>{escape(str(id2))}</td>"
+            f"<td>{escape(str(id_to_name.get(id2, '')))}</td>"
+            f"<td>{score:.4f}</td>"
+            "</tr>\n"
+            for id1, id2, score in top_pairs
+        )
     else:
-        html += (
+        out.write(
             "      <tr><td colspan=\"5\" class=\"muted\">"
             "No pairs available.</td></tr>\n"
         )
 
-    html += """    </tbody>
+    out.write("""    </tbody>
   </table>
 
   <h2>Clusters</h2>
-  <table>
+""")
+    if members_path is not None:
+        out.write(
+            f"  <p class=\"muted\">Showing the first {len(cluster_rows)} of "
+            f"{total_clusters} clusters. Full list: "
+            f"<a href=\"{escape(members_path.name)}\">{escape(members_path.name)}</a></p>\n"
+        )
+    out.write("""  <table>
     <thead>
       <tr>
         <th>Cluster</th>
@@ -116,44 +211,122 @@ def write_report(
       </tr>
     </thead>
     <tbody>
-"""
+""")
 
     if cluster_rows:
-        for cluster in cluster_rows:
-            members_html = ", ".join(
-                f"{escape(str(member_id))}: {escape(member_name)}"
-                for member_id, member_name in cluster["members"]
-            )
-            html += (
-                "      <tr>"
-                f"<td>{escape(cluster['cluster_id'])}</td>"
-                f"<td>{escape(cluster['canonical'])}</td>"
-                f"<td>{members_html}</td>"
-                "</tr>\n"
+        out.writelines(
+            "      <tr>"
+            f"<td>{_escape(cluster['cluster_id'])}</td>"
+            f"<td>{_escape(cluster['canonical'])}</td>"
+            "<td>"
+            + _escape(
+                ", ".join(
+                    f"{member_id}: {member_name}"
+                    for member_id, member_name in cluster["members"]
+                )
             )
+            + "</td></tr>\n"
+            for cluster in cluster_rows
+        )
     else:
-        html += (
+        out.write(
             "      <tr><td colspan=\"3\" class=\"muted\">"
             "No clusters available.</td></tr>\n"
         )
 
-    html += """    </tbody>
+    out.write("""    </tbody>
   </table>
-"""
+""")
 
     if metrics:
-        html += """\n  <h2>Evaluation (gold)</h2>\n  <ul>\n"""
-        html += (
+        out.write("""\n  <h2>Evaluation (gold)</h2>\n  <ul>\n""")
+        out.write(
             f"    <li>Precision: <code>{metrics['precision']:.3f}</code></li>\n"
             f"    <li>Recall: <code>{metrics['recall']:.3f}</code></li>\n"
             f"    <li>F1: <code>{metrics['f1']:.3f}</code></li>\n"
             f"    <li>Predicted pairs: <code>{int(metrics['predicted_pairs'])}</code></li>\n"
             f"    <li>Gold pairs: <code>{int(metrics['gold_pairs'])}</code></li>\n"
         )
-        html += "  </ul>\n"
+        if "bcubed_f1" in metrics:
+            out.write(
+                f"    <li>B-cubed precision: <code>{metrics['bcubed_precision']:.3f}</code></li>\n"
+                f"    <li>B-cubed recall: <code>{metrics['bcubed_recall']:.3f}</code></li>\n"
+                f"    <li>B-cubed F1: <code>{metrics['bcubed_f1']:.3f}</code></li>\n"
+                f"    <li>Adjusted Rand index: <code>{metrics['adjusted_rand_index']:.3f}</code></li>\n"
+            )
+        out.write("  </ul>\n")
 
-    html += """</body>
+    if sweep and sweep.get("points"):
+        out.write("\n  <h2>Threshold sweep</h2>\n")
+        out.write(
+            "  <p>Recommended threshold: "
+            f"<code>{sweep['recommended_threshold']:.3f}</code> (max F1)</p>\n"
+        )
+        out.write(_sweep_chart(sweep["points"]))
+        out.write("""  <table>
+    <thead>
+      <tr>
+        <th>Threshold</th>
+        <th>Precision</th>
+        <th>Recall</th>
+        <th>F1</th>
+        <th>Clusters</th>
+      </tr>
+    </thead>
+    <tbody>
+""")
+        out.writelines(
+            "      <tr>"
+            f"<td>{point['threshold']:.3f}</td>"
+            f"<td>{point['precision']:.3f}</td>"
+            f"<td>{point['recall']:.3f}</td>"
+            f"<td>{point['f1']:.3f}</td>"
+            f"<td>{int(point['clusters'])}</td>"
+            "</tr>\n"
+            for point in sweep["points"]
+        )
+        out.write("""    </tbody>
+  </table>
+""")
+
+    out.write("""</body>
 </html>
-"""
+""")
 
-    path.write_text(html, encoding="utf-8")
+
+def _sweep_chart(points: list[dict[str, float]]) -> str:
+    width, height, pad = 640, 260, 36
+    thresholds = [point["threshold"] for point in points]
+    low, high = min(thresholds), max(thresholds)
+    span = (high - low) or 1.0
+
+    def x_pos(value: float) -> float:
+        return pad + (value - low) / span * (width - 2 * pad)
+
+    def y_pos(value: float) -> float:
+        return height - pad - value * (height - 2 * pad)
+
+    series = [("precision", "#2f80ed"), ("recall", "#eb5757"), ("f1", "#27ae60")]
+    lines = []
+    for key, color in series:
+        coords = " ".join(
+            f"{x_pos(point['threshold']):.1f},{y_pos(point[key]):.1f}" for point in points
+        )
+        lines.append(
+            f'    <polyline fill="none" stroke="{color}" stroke-width="2" points="{coords}" />\n'
+        )
+    legend = "".join(
+        f'    <text x="{pad + 110 * offset}" y="{pad - 14}" fill="{color}">{key}</text>\n'
+        for offset, (key, color) in enumerate(series)
+    )
+    return (
+        f'  <svg width="{width}" height="{height}" viewBox="0 0 {width} {height}" '
+        'role="img" aria-label="Precision, recall and F1 by threshold">\n'
+        f'    <line x1="{pad}" y1="{height - pad}" x2="{width - pad}" y2="{height - pad}" stroke="#9fb3c8" />\n'
+        f'    <line x1="{pad}" y1="{pad}" x2="{pad}" y2="{height - pad}" stroke="#9fb3c8" />\n'
+        f'    <text x="{pad}" y="{height - 10}" class="muted">{low:.2f}</text>\n'
+        f'    <text x="{width - pad - 28}" y="{height - 10}" class="muted">{high:.2f}</text>\n'
+        + legend
+        + "".join(lines)
+        + "  </svg>\n"
+    )
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+from src.config import Config
+
+
+_HASH_CHUNK = 1024 * 1024
+_INDEX_FIELDS = ("embed_model", "search_backend", "qdrant_url", "dedupe_key")
+_UNCACHED_FIELDS = ("openai_api_key", "collection_name")
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while chunk := handle.read(_HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def index_key(config: Config, data_digest: str) -> str:
+    fields = {name: getattr(config, name) for name in _INDEX_FIELDS}
+    return _digest({"data": data_digest, **fields})
+
+
+def result_key(config: Config, data_digest: str, master_digest: str | None) -> str:
+    fields = {
+        name: value for name, value in asdict(config).items() if name not in _UNCACHED_FIELDS
+    }
+    return _digest({"data": data_digest, "master": master_digest, **fields})
+
+
+def _digest(values: dict[str, Any]) -> str:
+    encoded = json.dumps(values, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, directory: Path, max_bytes: int, ttl_seconds: float) -> None:
+        self._directory = directory.resolve()
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self._directory / "index.sqlite3"), check_same_thread=False
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY,"
+            " report TEXT NOT NULL,"
+            " files TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT report, files, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            report, files, created = row
+            entry_dir = self._directory / key
+            if self._expired(created, now) or not (entry_dir / report).exists():
+                self._delete([key])
+                return None
+            self._conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return {"key": key, "report": report, "files": json.loads(files), "created": created}
+
+    def put(self, key: str, report: Path, files: list[Path]) -> None:
+        entry_dir = self._directory / key
+        staging = self._directory / f".{key}.{threading.get_ident()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        size = 0
+        for path in [report, *files]:
+            _link_or_copy(path, staging / path.name)
+            size += path.stat().st_size
+        now = time.time()
+        with self._lock:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            staging.rename(entry_dir)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, report, files, size, created, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, report.name, json.dumps([path.name for path in files]), size, now, now),
+            )
+            self._conn.commit()
+            self._evict(now)
+
+    def path(self, key: str, filename: str) -> Path:
+        return self._directory / key / filename
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()
+        return int(row[0])
+
+    def evict_expired(self) -> None:
+        with self._lock:
+            self._evict(time.time())
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self._ttl_seconds > 0 and now - created > self._ttl_seconds
+
+    def _evict(self, now: float) -> None:
+        victims: list[str] = []
+        if self._ttl_seconds > 0:
+            victims.extend(
+                key
+                for (key,) in self._conn.execute(
+                    "SELECT key FROM results WHERE created < ?", (now - self._ttl_seconds,)
+                )
+            )
+        if self._max_bytes > 0:
+            total = 0
+            for key, size in self._conn.execute(
+                "SELECT key, size FROM results ORDER BY last_used DESC"
+            ).fetchall():
+                total += size
+                if total > self._max_bytes and key not in victims:
+                    victims.append(key)
+        if victims:
+            self._delete(victims)
+
+    def _delete(self, keys: list[str]) -> None:
+        self._conn.executemany("DELETE FROM results WHERE key = ?", [(key,) for key in keys])
+        self._conn.commit()
+        for key in keys:
+            shutil.rmtree(self._directory / key, ignore_errors=True)
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
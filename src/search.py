@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Protocol
+
+import numpy as np
+
+from src.config import Config
+from src.numpy_search import NumpySearchBackend
+from src.records import RecordBatch
+
+
+class SearchBackend(Protocol):
+    label: str
+
+    def ensure_collection(self, name: str, dim: int) -> bool: ...
+
+    def upsert_vectors(
+        self,
+        name: str,
+        rows: RecordBatch | list[dict[str, Any]],
+        vectors: np.ndarray | list[list[float]],
+    ) -> None: ...
+
+    def nearest(
+        self,
+        name: str,
+        top_k: int,
+        *,
+        id_to_vector: dict[Any, np.ndarray | list[float]] | None = None,
+        id_to_name: dict[Any, str] | None = None,
+        ids: list[Any] | None = None,
+    ) -> list[dict[str, Any]]: ...
+
+    def nearest_within(
+        self, name: str, top_k: int, *, ids: list[Any], within: list[Any]
+    ) -> list[dict[str, Any]]: ...
+
+    def query_top_by_vector(
+        self, name: str, vector: np.ndarray | list[float], top_k: int = 1
+    ) -> list[dict[str, Any]]: ...
+
+    def query_top_by_vectors(
+        self, name: str, vectors: np.ndarray, top_k: int = 1
+    ) -> list[list[dict[str, Any]]]: ...
+
+    def count_points(self, name: str) -> int | None: ...
+
+    def point_payloads(self, name: str, fields: list[str]) -> dict[Any, dict[str, Any]]: ...
+
+    def delete_points(self, name: str, ids: list[Any]) -> None: ...
+
+    def set_payloads(self, name: str, payloads: dict[Any, dict[str, Any]]) -> None: ...
+
+
+def get_search_backend(config: Config) -> SearchBackend:
+    if config.search_backend == "qdrant":
+        from src.qdrant_client import QdrantSearchBackend
+
+        return QdrantSearchBackend(
+            batch_size=config.search_batch_size,
+            upsert_batch_size=config.upsert_batch_size,
+            upsert_parallel=config.upsert_parallel,
+        )
+    if config.search_backend == "numpy":
+        block_bytes = config.search_block_mb * 1024 * 1024
+        if config.incremental:
+            # Incremental runs diff against earlier runs, so their collections
+            # live as long as the process.
+            return shared_numpy_backend(block_bytes)
+        return NumpySearchBackend(block_bytes=block_bytes)
+    raise ValueError("SEARCH_BACKEND must be one of: qdrant, numpy.")
+
+
+@lru_cache(maxsize=None)
+def shared_numpy_backend(block_bytes: int) -> NumpySearchBackend:
+    return NumpySearchBackend(block_bytes=block_bytes)
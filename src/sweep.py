@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import math
+from collections import Counter
+from typing import Any, Iterable
+
+from src.matcher import UnionFind
+
+
+def parse_thresholds(spec: str) -> list[float]:
+    spec = spec.strip()
+    if ":" in spec:
+        parts = spec.split(":")
+        if len(parts) != 3:
+            raise ValueError("Threshold range must look like start:stop:step.")
+        start, stop, step = (float(part) for part in parts)
+        if step <= 0:
+            raise ValueError("Threshold step must be positive.")
+        count = int(round((stop - start) / step)) + 1
+        values = [round(start + index * step, 6) for index in range(max(count, 0))]
+    else:
+        values = [float(part) for part in spec.split(",") if part.strip()]
+    if not values:
+        raise ValueError("No thresholds given.")
+    return sorted(set(values))
+
+
+def sweep_thresholds(
+    ids: Iterable[Any],
+    pairs: list[tuple[Any, Any, float]],
+    thresholds: list[float],
+    gold: dict[Any, Any],
+    groups: dict[Any, list[Any]] | None = None,
+) -> dict[str, Any]:
+    index = {point_id: position for position, point_id in enumerate(ids)}
+    uf = UnionFind(len(index))
+    size = [1] * len(index)
+    labels: list[Counter[Any]] = [Counter() for _ in index]
+    for point_id, position in index.items():
+        if point_id in gold:
+            labels[position][gold[point_id]] += 1
+
+    gold_sizes = Counter(gold.values())
+    gold_pairs = sum(count * (count - 1) // 2 for count in gold_sizes.values())
+    predicted_pairs = 0
+    true_positive = 0
+    clusters = len(index)
+
+    edges = sorted(
+        (
+            (score, index[id1], index[id2])
+            for id1, id2, score in pairs
+            if id1 in index and id2 in index
+        ),
+        reverse=True,
+    )
+    collapsed = [
+        (math.inf, index[representative], index[member])
+        for representative, members in (groups or {}).items()
+        for member in members
+        if member != representative and representative in index and member in index
+    ]
+    edges = collapsed + edges
+    points: list[dict[str, float]] = []
+    cursor = 0
+    for threshold in sorted(thresholds, reverse=True):
+        while cursor < len(edges) and edges[cursor][0] >= threshold:
+            _, left, right = edges[cursor]
+            cursor += 1
+            root_left, root_right = uf.find(left), uf.find(right)
+            if root_left == root_right:
+                continue
+            root = uf.union(root_left, root_right)
+            absorbed = root_right if root == root_left else root_left
+            predicted_pairs += size[root] * size[absorbed]
+            small, large = labels[root], labels[absorbed]
+            if len(small) > len(large):
+                small, large = large, small
+            true_positive += sum(count * large[label] for label, count in small.items())
+            large.update(small)
+            labels[root], labels[absorbed] = large, Counter()
+            size[root] += size[absorbed]
+            clusters -= 1
+
+        precision = _safe_divide(true_positive, predicted_pairs)
+        recall = _safe_divide(true_positive, gold_pairs)
+        points.append(
+            {
+                "threshold": threshold,
+                "precision": precision,
+                "recall": recall,
+                "f1": _safe_divide(2 * precision * recall, precision + recall),
+                "clusters": float(clusters),
+            }
+        )
+
+    points.sort(key=lambda point: point["threshold"])
+    best = max(points, key=lambda point: (point["f1"], point["threshold"]))
+    return {"points": points, "recommended_threshold": best["threshold"]}
+
+
+def _safe_divide(numerator: float, denominator: float) -> float:
+    if denominator == 0:
+        return 0.0
+    return numerator / denominator
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import IO, Any, BinaryIO
+
+
+PARTIAL_SUFFIX = ".partial"
+
+_COPY_CHUNK = 1024 * 1024
+_POLL_SECONDS = 0.2
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_UPLOAD_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadError(ValueError):
+    pass
+
+
+class UploadOffsetError(UploadError):
+    def __init__(self, offset: int) -> None:
+        super().__init__(f"Upload offset mismatch; resume from byte {offset}.")
+        self.offset = offset
+
+
+class UploadTooLargeError(UploadError):
+    pass
+
+
+class UnknownUploadError(UploadError):
+    def __init__(self) -> None:
+        super().__init__("Unknown upload id.")
+
+
+def partial_marker(path: Path) -> Path:
+    return path.with_name(path.name + PARTIAL_SUFFIX)
+
+
+def is_partial(path: Path) -> bool:
+    return partial_marker(path).exists()
+
+
+def open_text_input(path: str | Path, idle_timeout: float = 300.0) -> IO[str]:
+    resolved = Path(path)
+    if is_partial(resolved):
+        raw: BinaryIO = io.BufferedReader(GrowingFile(resolved, idle_timeout), _COPY_CHUNK)
+    else:
+        raw = open(resolved, "rb", buffering=_COPY_CHUNK)
+    try:
+        stream = _decompressed(raw)
+    except Exception:
+        raw.close()
+        raise
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+
+def _decompressed(raw: BinaryIO) -> BinaryIO:
+    magic = raw.peek(4)[:4] if hasattr(raw, "peek") else b""
+    if magic.startswith(_GZIP_MAGIC):
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+    if magic.startswith(_ZSTD_MAGIC):
+        try:
+            import zstandard
+        except ImportError as exc:
+            raise RuntimeError(
+                "Reading zstd-compressed input requires zstandard (pip install zstandard)."
+            ) from exc
+        return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    return raw
+
+
+class GrowingFile(io.RawIOBase):
+    def __init__(self, path: Path, idle_timeout: float) -> None:
+        self._file = open(path, "rb", buffering=0)
+        self._marker = partial_marker(path)
+        self._idle_timeout = idle_timeout
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        idle_since = time.monotonic()
+        while True:
+            count = self._file.readinto(buffer)
+            if count:
+                return count
+            if not self._marker.exists():
+                # The writer may have appended its last bytes just before finishing.
+                return self._file.readinto(buffer) or 0
+            if time.monotonic() - idle_since > self._idle_timeout:
+                raise TimeoutError("Upload stalled before it was completed.")
+            time.sleep(_POLL_SECONDS)
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+
+class UploadStore:
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._writing: set[str] = set()
+
+    def create(self, length: int | None = None) -> str:
+        if length is not None and length > self._max_bytes > 0:
+            raise UploadTooLargeError("Upload exceeds MAX_UPLOAD_MB.")
+        self._directory.mkdir(parents=True, exist_ok=True)
+        upload_id = uuid.uuid4().hex
+        path = self.path(upload_id)
+        path.touch()
+        partial_marker(path).write_text(json.dumps({"length": length}), encoding="utf-8")
+        return upload_id
+
+    def path(self, upload_id: str) -> Path:
+        if not _UPLOAD_ID_RE.match(upload_id):
+            raise UnknownUploadError()
+        return self._directory / f"{upload_id}.upload"
+
+    def exists(self, upload_id: str) -> bool:
+        try:
+            return self.path(upload_id).exists()
+        except UploadError:
+            return False
+
+    def status(self, upload_id: str) -> dict[str, Any]:
+        path = self.path(upload_id)
+        if not path.exists():
+            raise UnknownUploadError()
+        marker = partial_marker(path)
+        length = None
+        if marker.exists():
+            length = json.loads(marker.read_text(encoding="utf-8")).get("length")
+        return {
+            "upload_id": upload_id,
+            "offset": path.stat().st_size,
+            "length": length if marker.exists() else path.stat().st_size,
+            "complete": not marker.exists(),
+        }
+
+    def append(self, upload_id: str, offset: int, stream: BinaryIO) -> dict[str, Any]:
+        path = self.path(upload_id)
+        with self._lock:
+            if upload_id in self._writing:
+                raise UploadError("Another request is writing to this upload.")
+            self._writing.add(upload_id)
+        try:
+            status = self.status(upload_id)
+            if status["complete"]:
+                raise UploadError("Upload is already complete.")
+            if offset != status["offset"]:
+                raise UploadOffsetError(status["offset"])
+            limit = status["length"] if status["length"] is not None else self._max_bytes
+            written = offset
+            with open(path, "ab") as handle:
+                while chunk := stream.read(_COPY_CHUNK):
+                    written += len(chunk)
+                    if limit > 0 and written > limit:
+                        handle.truncate(offset)
+                        raise UploadTooLargeError("Upload exceeds its declared or allowed size.")
+                    handle.write(chunk)
+                    handle.flush()
+            if status["length"] is not None and written == status["length"]:
+                self.complete(upload_id)
+            return self.status(upload_id)
+        finally:
+            with self._lock:
+                self._writing.discard(upload_id)
+
+    def write_all(self, stream: BinaryIO) -> str:
+        upload_id = self.create()
+        self.append(upload_id, 0, stream)
+        self.complete(upload_id)
+        return upload_id
+
+    def complete(self, upload_id: str) -> None:
+        status = self.status(upload_id)
+        if status["length"] is not None and status["offset"] != status["length"]:
+            raise UploadOffsetError(status["offset"])
+        partial_marker(self.path(upload_id)).unlink(missing_ok=True)
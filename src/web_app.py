@@ -1,21 +1,91 @@
 from __future__ import annotations
 
+import hmac
+import json
 import os
 import uuid
 from dataclasses import replace
+from html import escape
 from pathlib import Path
-
-from flask import Flask, Response, request
+from typing import Any, Callable, Iterator
+
+from flask import (
+    Flask,
+    Response,
+    abort,
+    jsonify,
+    redirect,
+    request,
+    send_from_directory,
+    stream_with_context,
+)
 
 from src.config import Config
+from src.exports import parse_export_formats
+from src.healthchecks import health_status, start_health_refresh
+from src.jobs import Job, JobManager, QueueFullError
+from src.lifecycle import LifecycleManager
+from src.master_index import master_collection_name
+from src.metrics import REGISTRY
 from src.pipeline import run_pipeline
+from src.result_cache import ResultCache, file_digest, index_key, result_key
+from src.search import shared_numpy_backend
+from src.uploads import (
+    UploadError,
+    UploadOffsetError,
+    UploadStore,
+    UploadTooLargeError,
+    UnknownUploadError,
+    is_partial,
+)
 
 
 UPLOAD_DIR = Path("/tmp/embeddings_uploads")
 REPORT_DIR = Path("/tmp/embeddings_reports")
+SSE_HEARTBEAT_SECONDS = 15.0
+PARTIAL_UPLOAD_CHUNK_SIZE = 10_000
+
+
+def _lifecycle_manager(config: Config) -> LifecycleManager:
+    collection_stats = drop_collection = None
+    if config.search_backend == "qdrant":
+        from src import qdrant_client
+
+        collection_stats = qdrant_client.collection_stats
+        drop_collection = qdrant_client.delete_collection
+    elif config.search_backend == "numpy":
+        backend = shared_numpy_backend(config.search_block_mb * 1024 * 1024)
+        collection_stats = backend.collection_stats
+        drop_collection = backend.delete_collection
+    return LifecycleManager(
+        Path(config.lifecycle_db),
+        directories=[UPLOAD_DIR, REPORT_DIR],
+        ttl_seconds=config.lifecycle_ttl_hours * 3600,
+        max_bytes=config.lifecycle_max_mb * 1024 * 1024,
+        collection_stats=collection_stats,
+        drop_collection=drop_collection,
+    )
+
 
 app = Flask(__name__)
-app.config["MAX_CONTENT_LENGTH"] = 10 * 1024 * 1024
+_startup_config = Config.from_env()
+app.config["MAX_CONTENT_LENGTH"] = _startup_config.max_upload_mb * 1024 * 1024 or None
+UPLOADS = UploadStore(UPLOAD_DIR, max_bytes=_startup_config.max_upload_mb * 1024 * 1024)
+RESULTS = (
+    ResultCache(
+        Path(_startup_config.result_cache_dir),
+        max_bytes=_startup_config.result_cache_max_mb * 1024 * 1024,
+        ttl_seconds=_startup_config.result_cache_ttl_hours * 3600,
+    )
+    if _startup_config.result_cache_dir
+    else None
+)
+JOBS = JobManager(
+    workers=_startup_config.job_workers, queue_depth=_startup_config.job_queue_depth
+)
+LIFECYCLE = _lifecycle_manager(_startup_config)
+LIFECYCLE.start(_startup_config.lifecycle_sweep_minutes * 60)
+start_health_refresh(Config.from_env, _startup_config.health_refresh_seconds)
 
 
 def _render_layout(content: str, title: str = "Data Dedupe") -> str:
@@ -225,7 +295,7 @@ def _render_form(error: str | None = None, logs: str | None = None) -> str:
         f"""
         <form method=\"post\" action=\"/run\" enctype=\"multipart/form-data\">
           <label for=\"file\">Variations CSV</label>
-          <input id=\"file\" name=\"file\" type=\"file\" accept=\".csv\" required />
+          <input id=\"file\" name=\"file\" type=\"file\" accept=\".csv,.gz,.zst\" required />
           <div class=\"hint\">Expected columns: <strong>id</strong>, <strong>company_name</strong>.</div>
 
           <div class=\"grid\">
@@ -258,6 +328,25 @@ def _render_form(error: str | None = None, logs: str | None = None) -> str:
             </div>
           </div>
 
+          <div class=\"grid\">
+            <div>
+              <label>Exports</label>
+              <label for=\"export_csv\">
+                <input id=\"export_csv\" name=\"export_format\" type=\"checkbox\" value=\"csv\" checked />
+                CSV
+              </label>
+              <label for=\"export_jsonl\">
+                <input id=\"export_jsonl\" name=\"export_format\" type=\"checkbox\" value=\"jsonl\" />
+                JSON Lines
+              </label>
+              <label for=\"export_parquet\">
+                <input id=\"export_parquet\" name=\"export_format\" type=\"checkbox\" value=\"parquet\" />
+                Parquet
+              </label>
+              <div class=\"hint\">Mapping, clusters and pairs files are linked from the report.</div>
+            </div>
+          </div>
+
           <button class=\"btn\" type=\"submit\">Generate report</button>
         </form>
         {error_block}
@@ -278,32 +367,52 @@ def run_upload() -> Response:
     REPORT_DIR.mkdir(parents=True, exist_ok=True)
 
     uploaded = request.files.get("file")
-    if uploaded is None or uploaded.filename == "":
+    upload_id = (request.form.get("upload_id") or "").strip()
+    if upload_id:
+        if not UPLOADS.exists(upload_id):
+            return Response(_render_form(error="Unknown upload id."), mimetype="text/html")
+    elif uploaded is None or uploaded.filename == "":
         return Response(_render_form(error="Please select a CSV file."), mimetype="text/html")
 
-    use_master = request.form.get("use_master") == "on"
+    master_upload_id = (request.form.get("master_upload_id") or "").strip()
+    use_master = request.form.get("use_master") == "on" or bool(master_upload_id)
     master_upload = request.files.get("master_file")
-    if use_master and (master_upload is None or master_upload.filename == ""):
+    if master_upload_id:
+        if not UPLOADS.exists(master_upload_id):
+            return Response(
+                _render_form(error="Unknown master upload id."), mimetype="text/html"
+            )
+    elif use_master and (master_upload is None or master_upload.filename == ""):
         return Response(
             _render_form(error="Master CSV is required when matching to a master list."),
             mimetype="text/html",
         )
 
-    upload_id = uuid.uuid4().hex
-    upload_path = UPLOAD_DIR / f"{upload_id}.csv"
-    uploaded.save(upload_path)
+    try:
+        export_formats = parse_export_formats(",".join(request.form.getlist("export_format")))
+    except (RuntimeError, ValueError) as exc:
+        return Response(_render_form(error=str(exc)), mimetype="text/html")
+
+    written: list[Path] = []
+    if not upload_id:
+        upload_id = UPLOADS.write_all(uploaded.stream)
+        written.append(UPLOADS.path(upload_id))
+    upload_path = UPLOADS.path(upload_id)
 
     master_path = None
-    if use_master and master_upload is not None:
-        master_path = UPLOAD_DIR / f"{upload_id}_master.csv"
-        master_upload.save(master_path)
+    if master_upload_id:
+        master_path = UPLOADS.path(master_upload_id)
+    elif use_master and master_upload is not None:
+        master_path = UPLOADS.path(UPLOADS.write_all(master_upload.stream))
+        written.append(master_path)
 
     base_config = Config.from_env()
     threshold = _parse_float(request.form.get("threshold"))
     top_k = _parse_int(request.form.get("top_k"))
     collection = request.form.get("collection")
     collection_name = collection.strip() if collection else ""
-    if not collection_name:
+    custom_collection = bool(collection_name)
+    if not custom_collection:
         collection_name = f"{base_config.collection_name}_{upload_id[:8]}"
 
     config = replace(
@@ -311,29 +420,304 @@ def run_upload() -> Response:
         sim_threshold=threshold if threshold is not None else base_config.sim_threshold,
         top_k=top_k if top_k is not None else base_config.top_k,
         collection_name=collection_name,
+        export_formats=export_formats,
+        export_dir="",
+    )
+    if (
+        is_partial(upload_path)
+        and config.stream_chunk_size <= 0
+        and not config.incremental
+        and config.blocking != "replace"
+    ):
+        # Stream the input so embedding starts while the upload is still landing.
+        config = replace(config, stream_chunk_size=PARTIAL_UPLOAD_CHUNK_SIZE)
+
+    cache_key = None
+    uploads_complete = not is_partial(upload_path) and (
+        master_path is None or not is_partial(master_path)
     )
+    if RESULTS is not None and uploads_complete:
+        data_digest = file_digest(upload_path)
+        if not custom_collection:
+            # Same content, same model: keep one collection and only redo the
+            # search and clustering that the changed parameters need.
+            config = replace(
+                config,
+                collection_name=(
+                    f"{base_config.collection_name}_{index_key(config, data_digest)[:12]}"
+                ),
+                incremental=config.stream_chunk_size <= 0 and config.blocking != "replace",
+            )
+        master_digest = file_digest(master_path) if master_path is not None else None
+        cache_key = result_key(config, data_digest, master_digest)
+        cached = RESULTS.get(cache_key)
+        if cached is not None:
+            for path in written:
+                path.unlink(missing_ok=True)
+            return redirect(f"/results/{cache_key}/{cached['report']}", code=303)
+
+    run_id = uuid.uuid4().hex
+    report_path = REPORT_DIR / f"report_{run_id}.html"
+
+    # Only collections this app named itself are swept; user-named ones are left alone.
+    managed = []
+    if config.search_backend == "qdrant" or config.incremental:
+        if not custom_collection:
+            managed.append(config.collection_name)
+        if master_path is not None and not is_partial(master_path):
+            managed.append(master_collection_name(config, master_path))
+    leased_paths = [
+        path
+        for path in (upload_path, master_path, REPORT_DIR / f"report_{run_id}")
+        if path is not None
+    ]
+    LIFECYCLE.acquire(managed, leased_paths)
+
+    def run(log: Callable[[str], None]) -> dict[str, Any]:
+        try:
+            result = run_pipeline(
+                config=config,
+                data_path=upload_path,
+                report_path=report_path,
+                gold_path=None,
+                master_path=master_path,
+                log=log,
+            )
+        finally:
+            LIFECYCLE.release(managed, leased_paths)
+        if RESULTS is not None and cache_key is not None:
+            RESULTS.put(
+                cache_key,
+                result["report_path"],
+                sorted(REPORT_DIR.glob(f"report_{run_id}_*")),
+            )
+        return result
+
+    try:
+        job = JOBS.submit(run)
+    except QueueFullError as exc:
+        LIFECYCLE.release(managed, leased_paths)
+        for path in written:
+            path.unlink(missing_ok=True)
+        return Response(_render_form(error=str(exc)), status=503, mimetype="text/html")
+
+    return redirect(f"/jobs/{job.id}", code=303)
+
+
+@app.post("/uploads")
+def create_upload() -> Response:
+    payload = request.get_json(silent=True) or {}
+    length = payload.get("length")
+    if length is None:
+        length = _parse_int(request.headers.get("Upload-Length"))
+    elif not isinstance(length, int) or length < 0:
+        return _upload_error(UploadError("Upload length must be a non-negative integer."))
+    try:
+        upload_id = UPLOADS.create(length)
+    except UploadError as exc:
+        return _upload_error(exc)
+    response = jsonify(UPLOADS.status(upload_id))
+    response.status_code = 201
+    response.headers["Location"] = f"/uploads/{upload_id}"
+    response.headers["Upload-Offset"] = "0"
+    return response
+
+
+@app.route("/uploads/<upload_id>", methods=["GET", "HEAD"])
+def upload_status(upload_id: str) -> Response:
+    try:
+        return _upload_response(UPLOADS.status(upload_id))
+    except UploadError as exc:
+        return _upload_error(exc)
 
-    report_path = REPORT_DIR / f"report_{upload_id}.html"
-    logs: list[str] = []
 
+@app.patch("/uploads/<upload_id>")
+def append_upload(upload_id: str) -> Response:
+    offset = _parse_int(request.headers.get("Upload-Offset"))
+    if offset is None:
+        return _upload_error(UploadError("Upload-Offset header is required."))
     try:
-        run_pipeline(
-            config=config,
-            data_path=upload_path,
-            report_path=report_path,
-            gold_path=None,
-            master_path=master_path,
-            log=logs.append,
-        )
-    except Exception as exc:  # noqa: BLE001
-        logs_text = "\n".join(logs)
-        return Response(
-            _render_form(error=f"{exc}", logs=logs_text),
-            mimetype="text/html",
-        )
+        status = UPLOADS.append(upload_id, offset, request.stream)
+        if request.headers.get("Upload-Complete", "").lower() == "true":
+            UPLOADS.complete(upload_id)
+            status = UPLOADS.status(upload_id)
+    except UploadError as exc:
+        return _upload_error(exc)
+    return _upload_response(status)
+
+
+@app.post("/uploads/<upload_id>/complete")
+def complete_upload(upload_id: str) -> Response:
+    try:
+        UPLOADS.status(upload_id)
+        UPLOADS.complete(upload_id)
+        return _upload_response(UPLOADS.status(upload_id))
+    except UploadError as exc:
+        return _upload_error(exc)
+
+
+def _upload_response(status: dict[str, object]) -> Response:
+    response = jsonify(status)
+    response.headers["Upload-Offset"] = str(status["offset"])
+    return response
+
+
+def _upload_error(exc: UploadError) -> Response:
+    response = jsonify({"error": str(exc)})
+    if isinstance(exc, UploadOffsetError):
+        response.status_code = 409
+        response.headers["Upload-Offset"] = str(exc.offset)
+    elif isinstance(exc, UploadTooLargeError):
+        response.status_code = 413
+    elif isinstance(exc, UnknownUploadError):
+        response.status_code = 404
+    else:
+        response.status_code = 400
+    return response
+
+
+@app.get("/jobs/<job_id>")
+def job_page(job_id: str) -> Response:
+    job = _get_job(job_id)
+    return Response(_render_job(job), mimetype="text/html")
+
+
+@app.get("/jobs/<job_id>/status")
+def job_status(job_id: str) -> Response:
+    return jsonify(_get_job(job_id).to_dict())
+
+
+@app.get("/jobs/<job_id>/events")
+def job_events(job_id: str) -> Response:
+    job = _get_job(job_id)
+    cursor = _parse_int(request.headers.get("Last-Event-ID")) or 0
+
+    def stream() -> Iterator[str]:
+        nonlocal cursor
+        stage = None
+        while True:
+            lines, done = job.wait_for_logs(cursor, timeout=SSE_HEARTBEAT_SECONDS)
+            for line in lines:
+                cursor += 1
+                yield _sse_event("log", line, event_id=cursor)
+            if job.stage != stage:
+                stage = job.stage
+                yield _sse_event("status", json.dumps(job.to_dict()))
+            if done:
+                yield _sse_event("done", json.dumps(job.to_dict()))
+                return
+            if not lines:
+                yield ": keep-alive\n\n"
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _get_job(job_id: str) -> Job:
+    job = JOBS.get(job_id)
+    if job is None:
+        abort(404)
+    return job
+
+
+def _sse_event(event: str, data: str, event_id: int | None = None) -> str:
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.extend(f"data: {part}" for part in data.split("\n"))
+    return "\n".join(lines) + "\n\n"
+
+
+def _render_job(job: Job) -> str:
+    return _render_layout(
+        f"""
+        <h2>Run {escape(job.id[:8])}</h2>
+        <div class=\"hint\" id=\"stage\">Status: {escape(job.status)}</div>
+        <div class=\"error\" id=\"error\" hidden></div>
+        <div class=\"logs\" id=\"logs\"></div>
+        <script>
+          const logs = document.getElementById("logs");
+          const stage = document.getElementById("stage");
+          const error = document.getElementById("error");
+          const events = new EventSource("/jobs/{job.id}/events");
+          events.addEventListener("log", (event) => {{
+            logs.textContent += event.data + "\\n";
+          }});
+          events.addEventListener("status", (event) => {{
+            const job = JSON.parse(event.data);
+            stage.textContent = "Status: " + job.status + (job.stage ? " - " + job.stage : "");
+          }});
+          events.addEventListener("done", (event) => {{
+            events.close();
+            const job = JSON.parse(event.data);
+            if (job.status === "succeeded") {{
+              window.location = "/reports/" + job.result.report_path;
+            }} else {{
+              stage.textContent = "Status: failed";
+              error.textContent = job.error;
+              error.hidden = false;
+            }}
+          }});
+        </script>
+        """,
+        title="Embedding Dedupe Studio",
+    )
+
+
+@app.get("/healthz")
+def healthz() -> Response:
+    status = health_status(Config.from_env())
+    response = jsonify(status)
+    response.status_code = 200 if status["ok"] else 503
+    return response
+
+
+@app.get("/metrics")
+def metrics() -> Response:
+    gauges = {
+        "jobs": {(("status", status),): count for status, count in JOBS.counts().items()},
+        "result_cache_bytes": {(): RESULTS.size_bytes() if RESULTS is not None else 0},
+    }
+    return Response(
+        REGISTRY.render_prometheus(gauges), mimetype="text/plain; version=0.0.4"
+    )
+
+
+@app.get("/admin/usage")
+def admin_usage() -> Response:
+    token = Config.from_env().admin_token
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    if token and not hmac.compare_digest(supplied, token):
+        abort(401)
+    usage = LIFECYCLE.usage()
+    usage["jobs"] = JOBS.counts()
+    usage["result_cache_bytes"] = RESULTS.size_bytes() if RESULTS is not None else 0
+    return jsonify(usage)
+
+
+@app.get("/reports/<path:filename>")
+def report_file(filename: str) -> Response:
+    return _send_report_file(REPORT_DIR, filename)
+
+
+@app.get("/results/<key>/<path:filename>")
+def cached_result_file(key: str, filename: str) -> Response:
+    if RESULTS is None or RESULTS.get(key) is None:
+        abort(404)
+    return _send_report_file(RESULTS.path(key, ""), filename)
+
 
-    report_html = report_path.read_text(encoding="utf-8")
-    return Response(report_html, mimetype="text/html")
+def _send_report_file(directory: Path, filename: str) -> Response:
+    if not (directory / filename).is_file():
+        abort(404)
+    if filename.endswith(".html.gz"):
+        response = send_from_directory(directory, filename, mimetype="text/html")
+        response.headers["Content-Encoding"] = "gzip"
+        return response
+    return send_from_directory(directory, filename)
 
 
 def _parse_float(value: str | None) -> float | None:
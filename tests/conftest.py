@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import importlib
+import time
+from functools import partial
+from pathlib import Path
+from types import ModuleType
+
+import pytest
+from flask.testing import FlaskClient
+
+from benchmarks.run import stub_embedder
+from src.lifecycle import LifecycleManager
+from src.pipeline import run_pipeline
+from src.result_cache import ResultCache
+from src.uploads import UploadStore
+
+
+@pytest.fixture
+def web_app(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> ModuleType:
+    monkeypatch.chdir(tmp_path)
+    for name, value in {
+        "SEARCH_BACKEND": "numpy",
+        "EMBED_CACHE_PATH": "",
+        "LIFECYCLE_DB": str(tmp_path / "lifecycle.sqlite3"),
+        "LIFECYCLE_SWEEP_MINUTES": "0",
+        "HEALTH_REFRESH_SECONDS": "0",
+        "RESULT_CACHE_DIR": ".cache/results",
+    }.items():
+        monkeypatch.setenv(name, value)
+    module = importlib.import_module("src.web_app")
+    upload_dir = tmp_path / "uploads"
+    report_dir = tmp_path / "reports"
+    monkeypatch.setattr(module, "UPLOAD_DIR", upload_dir)
+    monkeypatch.setattr(module, "REPORT_DIR", report_dir)
+    monkeypatch.setattr(module, "UPLOADS", UploadStore(upload_dir, max_bytes=0))
+    monkeypatch.setattr(
+        module,
+        "RESULTS",
+        ResultCache(Path(".cache/results"), max_bytes=0, ttl_seconds=0),
+    )
+    monkeypatch.setattr(
+        module,
+        "LIFECYCLE",
+        LifecycleManager(
+            tmp_path / "lifecycle.sqlite3",
+            directories=[upload_dir, report_dir],
+            ttl_seconds=0,
+            max_bytes=0,
+        ),
+    )
+    monkeypatch.setattr(module, "run_pipeline", partial(run_pipeline, embedder=stub_embedder))
+    return module
+
+
+@pytest.fixture
+def client(web_app: ModuleType) -> FlaskClient:
+    return web_app.app.test_client()
+
+
+def wait_for_job(client: FlaskClient, location: str, timeout: float = 30.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = client.get(f"{location}/status").get_json()
+        if status["status"] in ("succeeded", "failed"):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"{location} did not finish")
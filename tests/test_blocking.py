@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import random
+
+from src.blocking import BUCKET_NEIGHBORS, lsh_candidates, minhash_signatures
+
+
+def _names(count: int) -> list[str]:
+    # A tiny vocabulary makes most names share buckets, the worst case for LSH.
+    rng = random.Random(3)
+    words = ["Acme", "Globex", "Initech", "Hooli", "Stark", "Wayne"]
+    suffixes = ["Inc", "Corp", "LLC", "Ltd"]
+    return [
+        f"{rng.choice(words)} {rng.choice(words)} {rng.choice(suffixes)} {index % 7}"
+        for index in range(count)
+    ]
+
+
+def _candidate_count(count: int, bands: int = 16, rows_per_band: int = 6) -> int:
+    signatures = minhash_signatures(_names(count), bands * rows_per_band)
+    return len(lsh_candidates(signatures, bands, rows_per_band))
+
+
+def test_candidate_count_grows_linearly() -> None:
+    medium = _candidate_count(8_000)
+    large = _candidate_count(16_000)
+
+    assert large <= 16_000 * 16 * BUCKET_NEIGHBORS
+    assert large / 16_000 <= 1.2 * medium / 8_000
+
+
+def test_identical_names_are_candidates() -> None:
+    names = ["Acme Widgets Inc", "Globex Corp", "Acme Widgets Inc", "Initech LLC"]
+    signatures = minhash_signatures(names, 96)
+
+    candidates = {tuple(pair) for pair in lsh_candidates(signatures, 16, 6).tolist()}
+
+    assert (0, 2) in candidates
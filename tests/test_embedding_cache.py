@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+
+from src.embedding_cache import EmbeddingCache
+
+
+def _vector(value: float) -> np.ndarray:
+    return np.full(4, value, dtype=np.float32)
+
+
+def test_size_tracks_inserts_replacements_and_reopen(tmp_path: Path) -> None:
+    path = tmp_path / "cache.sqlite3"
+    cache = EmbeddingCache(path, max_bytes=0)
+    cache.put_many("m", {"a": _vector(1), "b": _vector(2)})
+    cache.put_many("m", {"a": _vector(3)})
+    assert cache.size_bytes() == 32
+    cache.close()
+
+    reopened = EmbeddingCache(path, max_bytes=0)
+    assert reopened.size_bytes() == 32
+    assert reopened.get_many("m", ["a"])["a"].tolist() == [3.0] * 4
+    reopened.close()
+
+
+def test_eviction_keeps_cache_within_budget(tmp_path: Path) -> None:
+    cache = EmbeddingCache(tmp_path / "cache.sqlite3", max_bytes=48)
+    for index in range(5):
+        cache.put_many("m", {f"k{index}": _vector(index)})
+
+    assert cache.size_bytes() <= 48
+    assert set(cache.get_many("m", [f"k{index}" for index in range(5)])) == {"k2", "k3", "k4"}
+    cache.close()
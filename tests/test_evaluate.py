@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import pytest
+
+from src.evaluate import clustering_metrics
+
+
+def test_known_answer_metrics() -> None:
+    predicted = {1: "a", 2: "a", 3: "a", 4: "b", 5: "b", 6: "c"}
+    gold = {1: "x", 2: "x", 3: "y", 4: "y", 5: "y", 6: "y"}
+
+    metrics = clustering_metrics(predicted, gold)
+
+    assert metrics["predicted_pairs"] == 4
+    assert metrics["gold_pairs"] == 7
+    assert metrics["precision"] == pytest.approx(1 / 2)
+    assert metrics["recall"] == pytest.approx(2 / 7)
+    assert metrics["f1"] == pytest.approx(4 / 11)
+    assert metrics["bcubed_precision"] == pytest.approx(7 / 9)
+    assert metrics["bcubed_recall"] == pytest.approx(7 / 12)
+    assert metrics["bcubed_f1"] == pytest.approx(2 / 3)
+    assert metrics["adjusted_rand_index"] == pytest.approx(4 / 109)
+
+
+def test_identical_clusterings_score_one() -> None:
+    labels = {1: "a", 2: "a", 3: "b", 4: "b", 5: "c"}
+
+    metrics = clustering_metrics(labels, {key: value.upper() for key, value in labels.items()})
+
+    for name in ("precision", "recall", "f1", "bcubed_f1", "adjusted_rand_index"):
+        assert metrics[name] == pytest.approx(1.0)
+
+
+def test_all_singletons_have_no_pairs() -> None:
+    metrics = clustering_metrics({1: "a", 2: "b"}, {1: "x", 2: "y"})
+
+    assert metrics["precision"] == 0.0
+    assert metrics["recall"] == 0.0
+    assert metrics["bcubed_f1"] == pytest.approx(1.0)
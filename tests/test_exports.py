@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import csv
+import json
+from pathlib import Path
+
+import pytest
+
+from src.exports import parse_export_formats, write_exports
+from src.matcher import dedupe_mapping
+
+COMPANIES = [
+    {"id": 1, "company_name": "Acme Inc"},
+    {"id": 2, "company_name": "ACME Inc."},
+    {"id": 3, "company_name": "Globex"},
+]
+PAIRS = [(1, 2, 0.97)]
+
+
+def _write(tmp_path: Path, formats: tuple[str, ...]) -> list[Path]:
+    mapping = dedupe_mapping(COMPANIES, [{1, 2}])
+    return write_exports(tmp_path, "run", formats, COMPANIES, PAIRS, mapping)
+
+
+def test_csv_and_jsonl_tables(tmp_path: Path) -> None:
+    written = _write(tmp_path, ("csv", "jsonl"))
+
+    assert sorted(path.name for path in written) == [
+        "run_clusters.csv",
+        "run_clusters.jsonl",
+        "run_mapping.csv",
+        "run_mapping.jsonl",
+        "run_pairs.csv",
+        "run_pairs.jsonl",
+    ]
+    with open(tmp_path / "run_mapping.csv", encoding="utf-8", newline="") as handle:
+        mapping = list(csv.DictReader(handle))
+    assert [row["id"] for row in mapping] == ["1", "2", "3"]
+    assert mapping[0]["cluster_id"] == mapping[1]["cluster_id"] != mapping[2]["cluster_id"]
+
+    clusters = [
+        json.loads(line)
+        for line in (tmp_path / "run_clusters.jsonl").read_text(encoding="utf-8").splitlines()
+    ]
+    assert sorted((row["size"], sorted(row["member_ids"])) for row in clusters) == [
+        (1, [3]),
+        (2, [1, 2]),
+    ]
+    pairs = (tmp_path / "run_pairs.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in pairs] == [{"id1": 1, "id2": 2, "score": 0.97}]
+
+
+def test_parquet_tables(tmp_path: Path) -> None:
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    _write(tmp_path, ("parquet",))
+
+    table = pq.read_table(tmp_path / "run_clusters.parquet").to_pylist()
+    assert sorted(sorted(row["member_ids"]) for row in table) == [[1, 2], [3]]
+    assert pq.read_table(tmp_path / "run_pairs.parquet").to_pylist() == [
+        {"id1": 1, "id2": 2, "score": 0.97}
+    ]
+
+
+def test_parse_export_formats_dedupes_and_rejects_unknown() -> None:
+    assert parse_export_formats("csv, JSONL,csv") == ("csv", "jsonl")
+    with pytest.raises(ValueError):
+        parse_export_formats("csv,xml")
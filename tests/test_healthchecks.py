@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import replace
+
+import pytest
+
+from src import healthchecks
+from src.config import LOCAL_QDRANT_URL, Config
+
+
+def test_local_qdrant_is_not_probed() -> None:
+    config = replace(
+        Config.from_env(),
+        search_backend="qdrant",
+        qdrant_url=LOCAL_QDRANT_URL,
+    )
+
+    assert healthchecks._probes(config, embedding=False) == {}
+    assert list(healthchecks._probes(replace(config, qdrant_url="http://q:6333"), False)) == [
+        ("qdrant", "http://q:6333")
+    ]
+
+
+def test_refresh_logs_errors_and_keeps_running(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    monkeypatch.setattr(healthchecks, "_REFRESHER", None)
+    calls: list[int] = []
+    retried = threading.Event()
+
+    def config_factory() -> Config:
+        calls.append(1)
+        if len(calls) > 1:
+            retried.set()
+            # Park the daemon thread so it stops logging once the test has its answer.
+            threading.Event().wait()
+        raise ValueError("bad config")
+
+    with caplog.at_level(logging.ERROR, logger="src.healthchecks"):
+        healthchecks.start_health_refresh(config_factory, 0.01)
+        assert retried.wait(5)
+
+    assert "Health refresh failed" in caplog.text
+    assert "bad config" in caplog.text
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import csv
+import random
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from benchmarks.run import stub_embedder
+from src import qdrant_client
+from src.config import Config, get_config
+from src.pipeline import run_pipeline
+from src.search import get_search_backend
+
+
+def _write(path: Path, rows: dict[int, str]) -> Path:
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["id", "company_name"])
+        writer.writerows(rows.items())
+    return path
+
+
+def _names(rng: random.Random, count: int) -> list[str]:
+    stems = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark", "Wayne", "Wonka"]
+    suffixes = ["Inc", "Corp", "LLC", "Ltd", "Co", "Group"]
+    names: dict[str, None] = {}
+    while len(names) < count:
+        name = f"{rng.choice(stems)} {rng.choice(stems)[: rng.randint(2, 6)]} {rng.choice(suffixes)}"
+        names[name] = None
+    return list(names)
+
+
+@pytest.fixture
+def local_qdrant(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("QDRANT_URL", qdrant_client.LOCAL_QDRANT_URL)
+    monkeypatch.setenv("UPSERT_PARALLEL", "1")
+    get_config.cache_clear()
+    qdrant_client.close_clients()
+    yield
+    qdrant_client.close_clients()
+    get_config.cache_clear()
+
+
+def _pairs(config: Config, data_path: Path, report_path: Path) -> set[tuple[str, str]]:
+    result = run_pipeline(
+        config=config,
+        data_path=data_path,
+        report_path=report_path,
+        log=lambda message: None,
+        embedder=stub_embedder,
+    )
+    return {tuple(sorted((str(id1), str(id2)))) for id1, id2, _ in result["pairs"]}
+
+
+@pytest.mark.parametrize("backend", ["qdrant", "numpy"])
+def test_incremental_pairs_match_full_run(
+    tmp_path: Path, local_qdrant: None, backend: str
+) -> None:
+    rng = random.Random(7)
+    names = _names(rng, 80)
+    before = {point_id: name for point_id, name in enumerate(names[:60], start=1)}
+    after = dict(before)
+    for point_id in rng.sample(sorted(before), 8):
+        del after[point_id]
+    for point_id in rng.sample(sorted(after), 8):
+        after[point_id] = after[point_id] + " Holdings"
+    for offset, name in enumerate(names[60:], start=61):
+        after[offset] = name
+
+    config = replace(
+        Config.from_env(),
+        search_backend=backend,
+        top_k=5,
+        embed_cache_path="",
+        stream_chunk_size=0,
+        dedupe_key="none",
+        blocking="none",
+        export_formats=(),
+    )
+    incremental = replace(
+        config, incremental=True, collection_name=f"incremental_{tmp_path.name}"
+    )
+    _pairs(incremental, _write(tmp_path / "before.csv", before), tmp_path / "a.html")
+    assert get_search_backend(incremental).count_points(incremental.collection_name) == 60
+    updated = _pairs(incremental, _write(tmp_path / "after.csv", after), tmp_path / "b.html")
+
+    full = _pairs(
+        replace(config, incremental=False, collection_name="full"),
+        tmp_path / "after.csv",
+        tmp_path / "c.html",
+    )
+    assert updated == full
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from src.jobs import JobManager, QueueFullError
+
+
+def test_zero_queue_depth_accepts_runs_while_a_worker_is_free() -> None:
+    manager = JobManager(workers=2, queue_depth=0)
+    release = threading.Event()
+
+    def run(log):
+        release.wait(5)
+        return {}
+
+    try:
+        manager.submit(run)
+        manager.submit(run)
+        with pytest.raises(QueueFullError):
+            manager.submit(run)
+    finally:
+        release.set()
+        manager.shutdown()
+
+
+def test_queue_depth_counts_only_waiting_runs() -> None:
+    manager = JobManager(workers=1, queue_depth=1)
+    release = threading.Event()
+
+    def run(log):
+        release.wait(5)
+        return {}
+
+    try:
+        manager.submit(run)
+        manager.submit(run)
+        with pytest.raises(QueueFullError):
+            manager.submit(run)
+    finally:
+        release.set()
+        manager.shutdown()
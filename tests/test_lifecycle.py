@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from src.lifecycle import LifecycleManager
+
+
+def _manager(tmp_path: Path, directory: Path, **kwargs) -> LifecycleManager:
+    return LifecycleManager(
+        tmp_path / "lifecycle.sqlite3",
+        directories=[directory],
+        ttl_seconds=60,
+        max_bytes=0,
+        **kwargs,
+    )
+
+
+def _stale(path: Path) -> Path:
+    path.write_text("x", encoding="utf-8")
+    os.utime(path, (1, 1))
+    return path
+
+
+def test_sweep_keeps_reports_and_exports_of_a_running_job(tmp_path: Path) -> None:
+    reports = tmp_path / "reports"
+    reports.mkdir()
+    running = [
+        _stale(reports / "report_run1.html"),
+        _stale(reports / "report_run1.html.gz"),
+        _stale(reports / "report_run1_deduped.csv"),
+    ]
+    finished = _stale(reports / "report_run2.html")
+    manager = _manager(tmp_path, reports)
+    manager.acquire([], [reports / "report_run1"])
+
+    summary = manager.sweep()
+
+    assert summary["removed"] == [str(finished)]
+    assert all(path.exists() for path in running)
+
+
+def test_remove_rechecks_leases_taken_after_listing(tmp_path: Path) -> None:
+    dropped: list[str] = []
+    manager = _manager(
+        tmp_path,
+        tmp_path / "reports",
+        collection_stats=lambda name: (10, 4),
+        drop_collection=lambda name: dropped.append(name) or True,
+    )
+    manager.touch(["dedupe_abc"])
+    items = [{"kind": "collection", **item} for item in manager._collection_usage()]
+
+    manager.acquire(["dedupe_abc"], [])
+    assert manager._remove(items[0]) is False
+    manager.release(["dedupe_abc"], [])
+    assert manager._remove(items[0]) is False
+
+    assert dropped == []
+    assert [item["name"] for item in manager._collection_usage()] == ["dedupe_abc"]
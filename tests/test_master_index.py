@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from benchmarks.run import stub_embedder
+from src import master_index
+from src.config import Config
+from src.numpy_search import NumpySearchBackend
+
+
+@pytest.mark.parametrize("matrix_max_rows", [1_000, 0])
+def test_master_rows_are_parsed_only_when_building(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, matrix_max_rows: int
+) -> None:
+    master_path = tmp_path / f"master_{matrix_max_rows}.csv"
+    master_path.write_text(
+        "id,company_name\n1,Acme Incorporated\n2,Globex Corporation\n3,Initech\n",
+        encoding="utf-8",
+    )
+    loads: list[Path] = []
+    load_records = master_index.load_records
+
+    def counting_load(path: Path):
+        loads.append(path)
+        return load_records(path)
+
+    monkeypatch.setattr(master_index, "load_records", counting_load)
+    monkeypatch.setattr(master_index, "_MATRICES", OrderedDict())
+    monkeypatch.setattr(master_index, "_SIZES", OrderedDict())
+    config = replace(
+        Config.from_env(),
+        master_collection=f"master_{tmp_path.name}",
+        master_matrix_max_rows=matrix_max_rows,
+    )
+    backend = NumpySearchBackend(block_bytes=1024 * 1024)
+
+    lookups = [
+        master_index.load_master_index(
+            config=config,
+            backend=backend,
+            master_path=master_path,
+            embed=stub_embedder,
+            log=lambda message: None,
+        )
+        for _ in range(2)
+    ]
+
+    assert loads == [master_path]
+    for lookup in lookups:
+        assert lookup is not None
+        assert lookup(stub_embedder(["ACME Incorporated", "Initech LLC"])) == [
+            "Acme Incorporated",
+            "Initech",
+        ]
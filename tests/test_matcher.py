@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import numpy as np
+
+from src.matcher import UnionFind, cluster_candidates
+
+
+def test_union_edges_merges_chains_and_keeps_singletons() -> None:
+    uf = UnionFind(7)
+    uf.union_edges(np.array([5, 4, 3, 0]), np.array([4, 3, 2, 1]))
+
+    labels = uf.clusters().tolist()
+
+    assert labels[2] == labels[3] == labels[4] == labels[5]
+    assert labels[0] == labels[1]
+    assert len({labels[0], labels[2], labels[6]}) == 3
+
+
+def test_union_edges_handles_a_long_chain() -> None:
+    size = 100_000
+    uf = UnionFind(size)
+    nodes = np.arange(size - 1)
+    uf.union_edges(nodes[::-1], nodes[::-1] + 1)
+
+    assert set(uf.clusters().tolist()) == {0}
+
+
+def test_union_agrees_with_union_edges() -> None:
+    edges = [(0, 3), (3, 6), (1, 4), (7, 8), (8, 1)]
+    single = UnionFind(10)
+    for left, right in edges:
+        single.union(left, right)
+    batched = UnionFind(10)
+    batched.union_edges(*map(np.array, zip(*edges)))
+
+    def groups(uf: UnionFind) -> set[frozenset[int]]:
+        found: dict[int, set[int]] = {}
+        for item in range(10):
+            found.setdefault(uf.find(item), set()).add(item)
+        return {frozenset(group) for group in found.values()}
+
+    assert groups(single) == groups(batched)
+
+
+def test_cluster_candidates_applies_threshold() -> None:
+    pairs = [("a", "b", 0.95), ("b", "c", 0.91), ("c", "d", 0.5), ("e", "f", 0.9)]
+
+    clusters = cluster_candidates(pairs, 0.9)
+
+    assert sorted(map(sorted, clusters)) == [["a", "b", "c"], ["e", "f"]]
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import numpy as np
+
+from src.numpy_search import NumpySearchBackend
+
+
+def test_upsert_repeated_id_in_one_batch_keeps_last() -> None:
+    backend = NumpySearchBackend()
+    backend.ensure_collection("c", 2)
+    rows = [
+        {"id": 1, "company_name": "Acme"},
+        {"id": 2, "company_name": "Globex"},
+        {"id": 1, "company_name": "Acme Inc"},
+    ]
+    vectors = np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]], dtype=np.float32)
+
+    backend.upsert_vectors("c", rows, vectors)
+
+    assert backend.count_points("c") == 2
+    assert backend.point_payloads("c", ["company_name"])[1] == {"company_name": "Acme Inc"}
+    [[top]] = backend.query_top_by_vectors("c", np.array([[1.0, 1.0]]), top_k=1)
+    assert top["id"] == 1
+
+
+def test_upsert_repeated_existing_id_in_one_batch_keeps_last() -> None:
+    backend = NumpySearchBackend()
+    backend.ensure_collection("c", 2)
+    backend.upsert_vectors("c", [{"id": 1, "company_name": "Acme"}], [[1.0, 0.0]])
+
+    backend.upsert_vectors(
+        "c",
+        [{"id": 1, "company_name": "Acme Co"}, {"id": 1, "company_name": "Acme Corp"}],
+        [[0.0, 1.0], [1.0, 1.0]],
+    )
+
+    assert backend.count_points("c") == 1
+    assert backend.point_payloads("c", ["company_name"])[1] == {"company_name": "Acme Corp"}
+    [[top]] = backend.query_top_by_vectors("c", np.array([[1.0, 1.0]]), top_k=1)
+    assert top["score"] > 0.99
+
+
+def test_nearest_within_only_returns_candidates() -> None:
+    backend = NumpySearchBackend()
+    backend.ensure_collection("c", 2)
+    rows = [{"id": point_id, "company_name": str(point_id)} for point_id in range(1, 6)]
+    vectors = [[1.0, 0.0], [0.9, 0.1], [0.0, 1.0], [0.1, 0.9], [0.7, 0.7]]
+    backend.upsert_vectors("c", rows, vectors)
+
+    results = backend.nearest_within("c", 2, ids=[1, 3], within=[3, 4, 5])
+
+    neighbors = {(result["id"], result["neighbor_id"]) for result in results}
+    assert neighbors == {(1, 5), (1, 4), (3, 4), (3, 5)}
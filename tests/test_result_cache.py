@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from src.config import Config
+from src.result_cache import ResultCache, result_key
+
+
+def _files(tmp_path: Path, name: str, size: int = 10) -> tuple[Path, list[Path]]:
+    report = tmp_path / f"{name}.html"
+    report.write_bytes(b"r" * size)
+    export = tmp_path / f"{name}_pairs.csv"
+    export.write_bytes(b"e" * size)
+    return report, [export]
+
+
+def test_put_then_get_returns_entry(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path / "cache", max_bytes=0, ttl_seconds=0)
+    report, files = _files(tmp_path, "report_a")
+
+    cache.put("k1", report, files)
+    entry = cache.get("k1")
+
+    assert entry is not None
+    assert entry["report"] == "report_a.html"
+    assert entry["files"] == ["report_a_pairs.csv"]
+    assert cache.path("k1", entry["report"]).read_bytes() == b"r" * 10
+    assert cache.size_bytes() == 20
+    assert cache.get("missing") is None
+
+
+def test_expired_entries_are_dropped(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path / "cache", max_bytes=0, ttl_seconds=0.05)
+    cache.put("k1", *_files(tmp_path, "report_a"))
+    time.sleep(0.1)
+
+    assert cache.get("k1") is None
+    assert not (tmp_path / "cache" / "k1").exists()
+
+
+def test_budget_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path / "cache", max_bytes=50, ttl_seconds=0)
+    cache.put("old", *_files(tmp_path, "report_a"))
+    cache.put("used", *_files(tmp_path, "report_b"))
+    cache.get("old")
+    cache.put("new", *_files(tmp_path, "report_c"))
+
+    assert cache.get("used") is None
+    assert cache.get("old") is not None
+    assert cache.get("new") is not None
+
+
+def test_result_key_ignores_secrets_but_not_parameters() -> None:
+    config = Config.from_env()
+
+    base = result_key(config, "digest", None)
+
+    assert result_key(replace(config, openai_api_key="other"), "digest", None) == base
+    assert result_key(replace(config, sim_threshold=0.5), "digest", None) != base
+    assert result_key(config, "digest", "master") != base
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import io
+from pathlib import Path
+
+import pytest
+from flask.testing import FlaskClient
+
+from src.uploads import UploadOffsetError, UploadStore
+
+
+def test_complete_rejects_short_upload(tmp_path: Path) -> None:
+    store = UploadStore(tmp_path, max_bytes=0)
+    upload_id = store.create(length=10)
+    store.append(upload_id, 0, io.BytesIO(b"12345"))
+
+    with pytest.raises(UploadOffsetError) as raised:
+        store.complete(upload_id)
+
+    assert raised.value.offset == 5
+    assert store.status(upload_id)["complete"] is False
+
+
+def test_complete_endpoints_reject_short_upload(client: FlaskClient) -> None:
+    created = client.post("/uploads", json={"length": 10})
+    location = created.headers["Location"]
+
+    patched = client.patch(
+        location,
+        data=b"12345",
+        headers={"Upload-Offset": "0", "Upload-Complete": "true"},
+    )
+    assert patched.status_code == 409
+    assert patched.headers["Upload-Offset"] == "5"
+
+    completed = client.post(f"{location}/complete")
+    assert completed.status_code == 409
+    assert completed.headers["Upload-Offset"] == "5"
+    assert client.get(location).get_json()["complete"] is False
+
+
+def test_resumed_upload_completes_at_declared_length(client: FlaskClient) -> None:
+    location = client.post("/uploads", json={"length": 10}).headers["Location"]
+    client.patch(location, data=b"12345", headers={"Upload-Offset": "0"})
+
+    stale = client.patch(location, data=b"67890", headers={"Upload-Offset": "0"})
+    assert stale.status_code == 409
+    assert stale.headers["Upload-Offset"] == "5"
+
+    resumed = client.patch(
+        location,
+        data=b"67890",
+        headers={"Upload-Offset": "5", "Upload-Complete": "true"},
+    )
+    assert resumed.status_code == 200
+    assert resumed.get_json() == {
+        "upload_id": location.rsplit("/", 1)[-1],
+        "offset": 10,
+        "length": 10,
+        "complete": True,
+    }
+    assert client.post(f"{location}/complete").status_code == 200
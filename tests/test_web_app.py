@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import io
+
+from flask.testing import FlaskClient
+
+from tests.conftest import wait_for_job
+
+CSV = b"id,company_name\n1,Acme Inc\n2,ACME Inc.\n3,Globex Corp\n4,Initech LLC\n"
+
+
+def _submit(client: FlaskClient, data: bytes = CSV, **form: str):
+    return client.post(
+        "/run",
+        data={"file": (io.BytesIO(data), "companies.csv"), **form},
+        content_type="multipart/form-data",
+    )
+
+
+def test_metrics_endpoint_reports_runs_and_stages(client: FlaskClient) -> None:
+    response = _submit(client)
+    assert response.status_code == 303
+    assert wait_for_job(client, response.headers["Location"])["status"] == "succeeded"
+
+    metrics = client.get("/metrics")
+
+    assert metrics.status_code == 200
+    assert metrics.mimetype == "text/plain"
+    body = metrics.get_data(as_text=True)
+    assert "# TYPE dedupe_runs_total counter" in body
+    assert 'dedupe_runs_total{status="succeeded"}' in body
+    assert 'dedupe_stage_seconds_count{stage="embed"}' in body
+    assert 'dedupe_jobs{status="succeeded"} 1' in body
+    assert "dedupe_peak_rss_bytes" in body
+
+
+def test_identical_rerun_serves_cached_report(client: FlaskClient) -> None:
+    first = _submit(client)
+    assert wait_for_job(client, first.headers["Location"])["status"] == "succeeded"
+
+    second = _submit(client)
+
+    assert second.status_code == 303
+    assert second.headers["Location"].startswith("/results/")
+    report = client.get(second.headers["Location"])
+    assert report.status_code == 200
+    assert b"<html" in report.get_data().lower()